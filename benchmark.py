@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+Headless benchmarks of the data paths behind the GUI (filtering, sorting,
+cell formatting, materializing the filtered frame and preparing plots),
+driving the `DataFrameViewModel` engine without wx or a display. Example:
+
+    ./benchmark.py --sizes 1000000 10000000 --output report.json
+
+The report is a JSON file with one entry per (size, stage), so that the
+results of different versions can be compared. It also contains the
+speedup of scanning numeric filter conditions on `--filter-threads`
+threads.
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from dfgui.engine import DataFrameViewModel
+from dfgui.profiling import IMPORT_TIME_BUDGET, measure_import_time
+
+
+DEFAULT_SIZES = [1000000, 10000000, 50000000]
+
+CONDITIONS = [
+    ("IntColumn", "_ == 2"),
+    ("StringColumn", "_.isin(['A', 'C'])"),
+    ("Gaussian 1", "_ > -0.5"),
+    ("Date", "_ >= date(2016, 1, 10)"),
+]
+# conditions on numeric columns, whose evaluation releases the GIL and
+# therefore scales with the number of filter threads
+NUMERIC_CONDITIONS = [
+    ("Gaussian 1", "(_ > -0.5) & (_ < 1.5)"),
+    ("Gaussian 2", "abs(_) < 1"),
+    ("Uniform", "_ * 2 > 0.5"),
+]
+SORT_COLUMN = "Gaussian 1"
+HISTOGRAM_COLUMNS = ["Gaussian 1", "StringColumn"]
+SCATTER_COLUMNS = ("Gaussian 1", "Gaussian 2")
+PAGE_SIZE = 50
+
+
+def create_dummy_data(size, random_state=None):
+    """
+    Vectorized version of `create_dummy_data` in demo.py with the same
+    columns (dates are stored as datetime64 instead of date objects).
+    """
+    random = np.random.RandomState(random_state)
+    user_ids = random.randint(1, 1000000, 10)
+    product_ids = random.randint(1, 1000000, 100)
+
+    def choice(values):
+        return np.asarray(values)[random.randint(0, len(values), size)]
+
+    return pd.DataFrame(OrderedDict([
+        ("Date", np.datetime64("2016-01-01") + random.randint(1, 50, size).astype("timedelta64[D]")),
+        ("UserID", choice(user_ids)),
+        ("ProductID", choice(product_ids)),
+        ("IntColumn", choice([1, 2, 3])),
+        ("FloatColumn", choice([np.nan, 1.0, 2.0, 3.0])),
+        ("StringColumn", choice(np.array(["A", "B", "C"], dtype=object))),
+        ("Gaussian 1", random.normal(0, 1, size)),
+        ("Gaussian 2", random.normal(0, 1, size)),
+        ("Uniform", random.uniform(0, 1, size)),
+        ("Binomial", random.binomial(20, 0.1, size)),
+        ("Poisson", random.poisson(1.0, size)),
+    ]))
+
+
+def measure(func, repeat):
+    """
+    Calls func `repeat` times and returns the timings and the last result.
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.time()
+        result = func()
+        timings.append(time.time() - start)
+    return timings, result
+
+
+def benchmark_size(size, repeat, dictionary_encode=False, filter_threads=1):
+    """
+    Runs all stages on a generated data frame of the given size and
+    returns a list of (stage, timings). The scan of the numeric conditions
+    is measured on a single thread and on `filter_threads` threads.
+    """
+    results = []
+
+    def run(stage, func):
+        timings, result = measure(func, repeat)
+        results.append((stage, timings))
+        print("{:>10}  {:<32} {:8.4f} s".format(size, stage, min(timings)))
+        return result
+
+    df = run("generate", lambda: create_dummy_data(size, random_state=0))
+    model = run("load", lambda: DataFrameViewModel(df, dictionary_encode))
+
+    def compute_mask(use_column_indexes, keep_indexes=False, conditions=CONDITIONS):
+        # drop the cached condition masks (and indexes), so that the
+        # conditions are evaluated again
+        with model.condition_lock:
+            model.condition_masks.clear()
+        if not keep_indexes:
+            model.column_indexes.clear()
+        model.USE_COLUMN_INDEXES = use_column_indexes
+        return model.compute_mask(conditions)
+
+    run("filter_scan", lambda: compute_mask(False))
+    run("filter_scan_numeric", lambda: compute_mask(False, conditions=NUMERIC_CONDITIONS))
+    if filter_threads > 1:
+        model.filter_threads = filter_threads
+        run("filter_scan_numeric_parallel", lambda: compute_mask(False, conditions=NUMERIC_CONDITIONS))
+        model.filter_threads = None
+    # builds the column indexes and answers the conditions from them
+    run("filter_index_build", lambda: compute_mask(True))
+    mask, errors = run("filter_indexed", lambda: compute_mask(True, keep_indexes=True))
+    model.set_mask(CONDITIONS, mask)
+
+    def sort():
+        model.sort_orders.clear()
+        model.sort([(SORT_COLUMN, True)])
+
+    run("sort", sort)
+    run("update_rows", model.update_rows)
+
+    def format_page():
+        model.cell_formatter.invalidate()
+        start = len(model) // 2
+        return model.get_page(start, start + PAGE_SIZE)
+
+    run("format_page", format_page)
+    run("filtered_df", model.get_filtered_df)
+
+    for column in HISTOGRAM_COLUMNS:
+        position = model.columns.get_loc(column)
+
+        def histogram_binning():
+            model.binnings.pop(position, None)
+            return model.get_histogram(position)
+
+        run("histogram_binning " + column, histogram_binning)
+        run("histogram_counts " + column, lambda: model.get_histogram(position))
+
+    positions = [model.columns.get_loc(column) for column in SCATTER_COLUMNS]
+    run("scatter", lambda: model.get_scatter(positions[0], positions[1], "Density"))
+    return results
+
+
+def get_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.STDOUT
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the data paths of dfgui.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="numbers of rows")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per stage")
+    parser.add_argument("--output", default="benchmark.json", help="path of the JSON report")
+    parser.add_argument(
+        "--filter-threads", type=int, default=multiprocessing.cpu_count(),
+        help="threads of the parallel filter scan (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "--dictionary-encode", action="store_true", help="dictionary encode low cardinality string columns"
+    )
+    args = parser.parse_args()
+
+    import_time, heavy_modules = measure_import_time()
+    print("import dfgui: {:.3f} s (budget {:.1f} s)".format(import_time, IMPORT_TIME_BUDGET))
+    if import_time > IMPORT_TIME_BUDGET or len(heavy_modules) > 0:
+        print("WARNING: import dfgui exceeds its budget (imported: {})".format(", ".join(heavy_modules) or "-"))
+
+    report = {
+        "revision": get_revision(),
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "dictionary_encode": args.dictionary_encode,
+        "cpu_count": multiprocessing.cpu_count(),
+        "filter_threads": args.filter_threads,
+        "import": {
+            "seconds": import_time,
+            "budget": IMPORT_TIME_BUDGET,
+            "heavy_modules": heavy_modules,
+            "within_budget": import_time <= IMPORT_TIME_BUDGET and len(heavy_modules) == 0,
+        },
+        "results": [],
+    }
+    for size in args.sizes:
+        results = benchmark_size(size, args.repeat, args.dictionary_encode, args.filter_threads)
+        timings_by_stage = dict(results)
+        if "filter_scan_numeric_parallel" in timings_by_stage:
+            speedup = (
+                min(timings_by_stage["filter_scan_numeric"]) / min(timings_by_stage["filter_scan_numeric_parallel"])
+            )
+            print("{:>10}  filter speedup on {} threads: {:.2f}x".format(size, args.filter_threads, speedup))
+            report.setdefault("filter_speedup", {})[str(size)] = speedup
+        for stage, timings in results:
+            report["results"].append({
+                "size": size,
+                "stage": stage,
+                "min": min(timings),
+                "median": float(np.median(timings)),
+                "timings": timings,
+            })
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Report written to", args.output)
+    return 0 if report["import"]["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
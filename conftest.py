@@ -0,0 +1,2 @@
+# makes the dfgui package in this directory importable when the tests are
+# run with a plain `pytest` (instead of `python -m pytest`)
@@ -1,7 +1,25 @@
 from __future__ import absolute_import
 
-from dfgui.dfgui import show
-
 __all__ = [
-    "show"
+    "show",
+    "show_live",
 ]
+
+
+def show(df, dictionary_encode=False, filter_threads=None, column_indexes=False):
+    """
+    The main function to start the data frame GUI, see `dfgui.dfgui.show`.
+    """
+    # wx and the GUI are only imported once a window is actually opened,
+    # so that importing dfgui stays cheap
+    from dfgui.dfgui import show as show_gui
+    show_gui(df, dictionary_encode, filter_threads, column_indexes)
+
+
+def show_live(df):
+    """
+    Opens the data frame GUI without blocking and returns a handle to
+    append rows to it, see `dfgui.dfgui.show_live`.
+    """
+    from dfgui.dfgui import show_live as show_live_gui
+    return show_live_gui(df)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+Group-by aggregation of the filtered rows of a data source.
+"""
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from dfgui.statistics import mask_key
+
+
+AGGREGATIONS = ["count", "sum", "mean", "min", "max", "std", "25%", "50%", "75%"]
+# aggregations which are also computed for non-numeric columns
+ORDINAL_AGGREGATIONS = ["count", "min", "max"]
+
+
+class GroupByAggregation(object):
+    """
+    Aggregates value columns of the rows of a data source selected by a
+    filter mask, grouped by key columns. Results are cached per (mask,
+    keys, values, aggregations), so that recomputing a previously shown
+    aggregation is a lookup.
+    """
+
+    MAX_CACHED_RESULTS = 16
+
+    def __init__(self, source):
+        self.source = source
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(mask, keys, values, aggregations):
+        return mask_key(mask), tuple(keys), tuple(values), tuple(aggregations)
+
+    def get_cached(self, mask, keys, values, aggregations):
+        """
+        Returns the cached result or None.
+        """
+        key = self._cache_key(mask, keys, values, aggregations)
+        with self.lock:
+            result = self.cache.pop(key, None)
+            if result is not None:
+                self.cache[key] = result
+        return result
+
+    def compute(self, mask, keys, values, aggregations):
+        """
+        Returns a data frame with one row per group (including groups of
+        missing keys), containing the key columns, the group sizes (as
+        "count", if requested), and one column per value column and
+        aggregation (named like "price mean"). `keys` and `values` are
+        column positions. Aggregations which are not defined for a column
+        (like the mean of strings) are omitted.
+        """
+        if len(keys) == 0:
+            raise ValueError("At least one group key is required")
+        result = self.get_cached(mask, keys, values, aggregations)
+        if result is not None:
+            return result
+
+        positions = list(OrderedDict.fromkeys(list(keys) + list(values)))
+        frame = pd.concat(
+            [self.source.get_filtered_column(column, mask) for column in positions], axis=1
+        )
+        key_names = [self.source.columns[column] for column in keys]
+        # observed=True skips the unused categories of categorical keys,
+        # dropna=False keeps the rows with missing keys as groups of their own
+        grouped = frame.groupby(key_names, sort=True, observed=True, dropna=False)
+
+        results = []
+        names = []
+        if "count" in aggregations:
+            # the group sizes, which are shown even without value columns
+            results.append(grouped.size())
+            names.append("count")
+        for column in values:
+            name = self.source.columns[column]
+            is_numeric = frame[name].dtype.kind in "iufb"
+            for aggregation in aggregations:
+                if not (is_numeric or aggregation in ORDINAL_AGGREGATIONS):
+                    continue
+                try:
+                    results.append(_aggregate(grouped[name], aggregation))
+                except (TypeError, ValueError):
+                    continue
+                names.append("{} {}".format(name, aggregation))
+
+        if len(results) > 0:
+            result = pd.concat(results, axis=1)
+            result.columns = names
+        else:
+            result = pd.DataFrame(index=grouped.size().index)
+        result = result.reset_index()
+
+        key = self._cache_key(mask, keys, values, aggregations)
+        with self.lock:
+            self.cache[key] = result
+            if len(self.cache) > self.MAX_CACHED_RESULTS:
+                self.cache.popitem(last=False)
+        return result
+
+
+def _aggregate(grouped, aggregation):
+    if aggregation.endswith("%"):
+        return grouped.quantile(float(aggregation[:-1]) / 100)
+    return grouped.agg(aggregation)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+Column indexes which answer filter conditions without comparing every
+value of the column.
+
+Numeric and datetime columns store their sort order, so that
+comparisons, ranges and membership tests become binary searches. Other
+columns with few distinct values (strings, categoricals, dates stored as
+objects) are dictionary encoded and store the row positions of each
+distinct value. A condition is evaluated once per distinct value, and
+the mask is assembled from the position lists of the matching values.
+"""
+
+import datetime
+import numbers
+
+import numpy as np
+import pandas as pd
+
+from dfgui import filtering
+
+
+MAX_DISTINCT_VALUES = 1000
+# number of values checked before factorizing a full column
+CARDINALITY_SAMPLE_SIZE = 10000
+
+
+def build_column_index(column, max_distinct=MAX_DISTINCT_VALUES):
+    """
+    Builds the index of a column (a pandas series), or returns None if
+    the column cannot be indexed.
+    """
+    column = column.reset_index(drop=True)
+    if isinstance(column.dtype, np.dtype) and column.dtype.kind in "iufM":
+        return SortedIndex(column)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # dictionary encoded already
+        num_values = len(column.cat.categories)
+        if num_values <= max_distinct:
+            return DictionaryIndex(column, column.cat.codes.values, num_values)
+        return None
+    try:
+        sample = column.iloc[:CARDINALITY_SAMPLE_SIZE]
+        if sample.nunique(dropna=False) <= max_distinct:
+            codes, uniques = pd.factorize(column)
+            if len(uniques) <= max_distinct:
+                return DictionaryIndex(column, codes, len(uniques))
+    except TypeError:
+        # unhashable values
+        pass
+    return None
+
+
+class DictionaryIndex(object):
+    """
+    Index of a column with few distinct values, storing the sorted row
+    positions per distinct value.
+    """
+
+    # below this fraction of matching rows, the mask is assembled from
+    # the position lists instead of mapping the codes of all rows
+    SCATTER_FRACTION = 0.1
+
+    def __init__(self, column, codes, num_values):
+        # shift by one, so that missing values (-1) get code 0
+        codes = codes + 1
+        dtype = np.uint8 if num_values < 255 else np.uint16
+        self.codes = codes.astype(dtype)
+        self.num_rows = len(codes)
+        # a stable sort of small integers is a radix sort
+        self.positions = np.argsort(self.codes, kind="stable")
+        self.counts = np.bincount(self.codes, minlength=num_values + 1)
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)])
+        # one row per code (rows of unused codes, i.e. the missing value
+        # code of columns without missing values, are dropped), keeping
+        # the dtype of the column
+        self.used_codes = np.flatnonzero(self.counts)
+        self.representatives = column.take(self.positions[self.starts[self.used_codes]])
+
+    def __len__(self):
+        return self.num_rows
+
+    def evaluate(self, expression):
+        """
+        Returns the mask of the rows matching the FilterExpression, or
+        None if the condition does not evaluate to a boolean mask.
+        """
+        matches = np.asarray(expression.evaluate(self.representatives))
+        if matches.dtype != bool or matches.shape != (len(self.used_codes),):
+            return None
+        matching_codes = self.used_codes[matches]
+        if self.counts[matching_codes].sum() < self.SCATTER_FRACTION * self.num_rows:
+            mask = np.zeros(self.num_rows, dtype=bool)
+            for code in matching_codes:
+                mask[self.positions[self.starts[code]:self.starts[code + 1]]] = True
+            return mask
+        table = np.zeros(len(self.counts), dtype=bool)
+        table[matching_codes] = True
+        return table[self.codes]
+
+
+class SortedIndex(object):
+    """
+    Index of a numeric or datetime column, storing the row positions in
+    ascending order of the (non-missing) values.
+    """
+
+    def __init__(self, column):
+        values = column.values
+        self.dtype = values.dtype
+        self.num_rows = len(values)
+        valid = column.notnull().values
+        valid_positions = np.flatnonzero(valid)
+        self.null_positions = np.flatnonzero(~valid)
+        self.order = valid_positions[np.argsort(values[valid_positions], kind="mergesort")]
+        self.sorted_values = values[self.order]
+
+    def __len__(self):
+        return self.num_rows
+
+    def evaluate(self, expression):
+        """
+        Returns the mask of the rows matching the FilterExpression, or
+        None if the condition cannot be answered from the index.
+        """
+        try:
+            return self._evaluate(expression.root)
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    def _evaluate(self, node):
+        if isinstance(node, filtering.Compare):
+            return self._evaluate_compare(node)
+        elif isinstance(node, filtering.Between):
+            low, high = self._key(node.low), self._key(node.high)
+            if low is None or high is None:
+                return None
+            return self._range_mask(self._search(low, "left"), self._search(high, "right"))
+        elif isinstance(node, filtering.IsIn):
+            return self._evaluate_isin(node)
+        elif isinstance(node, filtering.Logical):
+            masks = [self._evaluate(operand) for operand in node.operands]
+            if any(mask is None for mask in masks):
+                return None
+            result = masks[0]
+            for mask in masks[1:]:
+                result = node.func(result, mask)
+            return result
+        elif isinstance(node, filtering.Unary) and node.symbol == "~":
+            mask = self._evaluate(node.operand)
+            return None if mask is None else ~mask
+        return None
+
+    def _evaluate_compare(self, node):
+        symbol = node.symbol
+        if isinstance(node.left, filtering.Column) and isinstance(node.right, filtering.Constant):
+            key = self._key(node.right.value)
+        elif isinstance(node.left, filtering.Constant) and isinstance(node.right, filtering.Column):
+            key = self._key(node.left.value)
+            # `c < _` is `_ > c`
+            symbol = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}.get(symbol, symbol)
+        else:
+            return None
+        if key is None:
+            return None
+
+        n = len(self.sorted_values)
+        if symbol == "==":
+            return self._range_mask(self._search(key, "left"), self._search(key, "right"))
+        elif symbol == "!=":
+            # like pandas, missing values are unequal to everything
+            return ~self._range_mask(self._search(key, "left"), self._search(key, "right"))
+        elif symbol == "<":
+            return self._range_mask(0, self._search(key, "left"))
+        elif symbol == "<=":
+            return self._range_mask(0, self._search(key, "right"))
+        elif symbol == ">":
+            return self._range_mask(self._search(key, "right"), n)
+        elif symbol == ">=":
+            return self._range_mask(self._search(key, "left"), n)
+        return None
+
+    def _evaluate_isin(self, node):
+        mask = np.zeros(self.num_rows, dtype=bool)
+        for value in node.values:
+            if _is_missing(value):
+                mask[self.null_positions] = True
+                continue
+            key = self._key(value)
+            if key is None:
+                return None
+            mask[self.order[self._search(key, "left"):self._search(key, "right")]] = True
+        return ~mask if node.negate else mask
+
+    def _key(self, value):
+        """
+        Converts a constant of a condition into a search key, or returns
+        None if comparing with it is not supported by the index.
+        """
+        if self.dtype.kind == "M":
+            if isinstance(value, (datetime.date, np.datetime64)) and not _is_missing(value):
+                key = np.datetime64(pd.Timestamp(value))
+                converted = key.astype(self.dtype)
+                # keys which are not representable in the unit of the
+                # column (e.g. milliseconds for seconds) would be truncated
+                return converted if converted == key else None
+            return None
+        if isinstance(value, (numbers.Number, np.number)) and not _is_missing(value):
+            return value
+        return None
+
+    def _search(self, key, side):
+        return int(np.searchsorted(self.sorted_values, key, side=side))
+
+    def _range_mask(self, start, stop):
+        mask = np.zeros(self.num_rows, dtype=bool)
+        mask[self.order[start:stop]] = True
+        return mask
+
+
+def _is_missing(value):
+    try:
+        return bool(pd.isnull(value))
+    except (TypeError, ValueError):
+        return False
@@ -0,0 +1,428 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+Data sources provide the table shown by dfgui. Apart from in-memory data
+frames, tables can be read lazily from files which do not fit into memory
+(Parquet, Arrow IPC/Feather, memory-mapped NumPy arrays and CSV). Lazy
+sources are split into chunks (e.g. Parquet row groups), visible rows are
+paged in on demand, and full scans (filters, plots) run chunk by chunk on
+single columns.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# object columns are dictionary encoded if they have at most this
+# fraction of distinct values
+MAX_DISTINCT_FRACTION = 0.1
+# number of values checked before factorizing a full column
+CARDINALITY_SAMPLE_SIZE = 10000
+
+
+class DataSource(object):
+    """
+    Base class of lazy data sources. Subclasses have to provide `columns`,
+    the row offsets of their chunks in `chunk_offsets` (starting with 0
+    and ending with the number of rows) and implement `read_chunk`.
+    """
+
+    MAX_CACHED_PAGES = 256
+
+    columns = pd.Index([])
+    chunk_offsets = np.array([0])
+
+    def __init__(self):
+        self.page_cache = OrderedDict()
+
+    @property
+    def num_rows(self):
+        return int(self.chunk_offsets[-1])
+
+    @property
+    def num_chunks(self):
+        return len(self.chunk_offsets) - 1
+
+    def read_chunk(self, chunk_index, columns):
+        """
+        Reads the given column positions of a chunk and returns them as
+        list of series.
+        """
+        raise NotImplementedError
+
+    def _get_page(self, chunk_index, column):
+        key = (chunk_index, column)
+        page = self.page_cache.get(key)
+        if page is None:
+            page = self.read_chunk(chunk_index, [column])[0]
+            self.page_cache[key] = page
+            if len(self.page_cache) > self.MAX_CACHED_PAGES:
+                self.page_cache.popitem(last=False)
+        else:
+            # mark as recently used
+            del self.page_cache[key]
+            self.page_cache[key] = page
+        return page
+
+    def take(self, rows, columns):
+        """
+        Returns the rows at the given positions for the given column
+        positions as list of series. Only the chunks containing these
+        rows are read.
+        """
+        rows = np.asarray(rows, dtype=int)
+        chunk_indices = np.searchsorted(self.chunk_offsets, rows, side="right") - 1
+        selections = [
+            (chunk_index, np.flatnonzero(chunk_indices == chunk_index))
+            for chunk_index in np.unique(chunk_indices)
+        ]
+        result = []
+        for column in columns:
+            pieces = [
+                self._get_page(chunk_index, column).take(rows[selection] - self.chunk_offsets[chunk_index])
+                for chunk_index, selection in selections
+            ]
+            positions = [selection for chunk_index, selection in selections]
+            result.append(_reassemble(pieces, positions, self.columns[column]))
+        return result
+
+    def to_frame(self, rows, columns):
+        """
+        Materializes the given rows and column positions as data frame.
+        """
+        series = self.take(rows, columns)
+        if len(series) == 0:
+            return pd.DataFrame(index=pd.RangeIndex(len(rows)))
+        return pd.concat(series, axis=1)
+
+    def iter_column_chunks(self, column, start=0):
+        """
+        Iterates over a single column chunk by chunk, yielding series.
+        Iteration begins at row `start`, i.e., the first chunk may be
+        partial.
+        """
+        offsets = self.chunk_offsets
+        first = np.searchsorted(offsets, start, side="right") - 1 if start > 0 else 0
+        for chunk_index in range(first, len(offsets) - 1):
+            page = self.page_cache.get((chunk_index, column))
+            if page is None:
+                # full scans bypass the page cache
+                page = self.read_chunk(chunk_index, [column])[0]
+            # the last chunk of a growing source may have grown since
+            # reading the offsets
+            lo = max(start - offsets[chunk_index], 0)
+            hi = offsets[chunk_index + 1] - offsets[chunk_index]
+            if lo > 0 or len(page) != hi:
+                page = page.iloc[lo:hi]
+            yield page
+
+    def get_filtered_column(self, column, mask):
+        """
+        Returns the values of a column for all rows selected by the
+        boolean mask, reading the column chunk by chunk. Rows beyond
+        the length of the mask (appended after computing it) are ignored.
+        """
+        offsets = self.chunk_offsets
+        pieces = []
+        for i, chunk in enumerate(self.iter_column_chunks(column)):
+            if i >= len(offsets) - 1 or offsets[i] >= len(mask):
+                break
+            part = mask[offsets[i]:offsets[i + 1]]
+            pieces.append(chunk.values[:len(part)][part])
+        if len(pieces) == 1:
+            values = pieces[0]
+        else:
+            values = np.concatenate(pieces) if len(pieces) > 0 else np.array([])
+        return pd.Series(values, name=self.columns[column])
+
+    def get_column(self, column):
+        """
+        Reads a single full column.
+        """
+        chunks = list(self.iter_column_chunks(column))
+        if len(chunks) == 0:
+            return pd.Series([], name=self.columns[column])
+        return pd.concat(chunks, ignore_index=True)
+
+
+def _reassemble(pieces, positions, name):
+    if len(pieces) == 0:
+        return pd.Series([], name=name)
+    elif len(pieces) == 1:
+        return pieces[0].reset_index(drop=True)
+    series = pd.concat(pieces, ignore_index=True)
+    order = np.argsort(np.concatenate(positions), kind="mergesort")
+    return series.take(order).reset_index(drop=True)
+
+
+class DataFrameSource(DataSource):
+    """
+    An in-memory data frame (a single chunk, no copies).
+    """
+
+    def __init__(self, df):
+        DataSource.__init__(self)
+        self.df = df
+        self.columns = df.columns
+        self.chunk_offsets = np.array([0, df.shape[0]])
+        self.series_cache = {}
+
+    def get_column(self, column):
+        if column not in self.series_cache:
+            self.series_cache[column] = self.df.iloc[:, column]
+        return self.series_cache[column]
+
+    def read_chunk(self, chunk_index, columns):
+        return [self.get_column(column) for column in columns]
+
+    def take(self, rows, columns):
+        return [self.get_column(column).take(rows) for column in columns]
+
+    def to_frame(self, rows, columns):
+        return self.df.iloc[rows, columns]
+
+    def iter_column_chunks(self, column, start=0):
+        yield self.get_column(column) if start == 0 else self.get_column(column).iloc[start:]
+
+
+class StreamingSource(DataSource):
+    """
+    An in-memory table which grows by appending data frames. Appended
+    rows are collected into chunks of up to `chunk_size` rows, so that an
+    append only copies the rows of the last, incomplete chunk.
+    """
+
+    CHUNK_SIZE = 100000
+
+    def __init__(self, df, chunk_size=CHUNK_SIZE):
+        DataSource.__init__(self)
+        self.columns = df.columns
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.chunk_offsets = np.array([0])
+        self.append(df)
+
+    def append(self, df):
+        """
+        Appends the rows of a data frame with the same columns.
+        """
+        if list(df.columns) != list(self.columns):
+            raise ValueError("Appended data frame has different columns")
+        df = df.reset_index(drop=True)
+        # offsets are replaced rather than modified, so that readers on
+        # other threads always see a consistent state
+        offsets = self.chunk_offsets.copy()
+        if len(self.chunks) > 0 and len(self.chunks[-1]) < self.chunk_size:
+            last = len(self.chunks) - 1
+            self.chunks[last] = pd.concat([self.chunks[last], df], ignore_index=True)
+            offsets[-1] += len(df)
+            for key in [key for key in self.page_cache if key[0] == last]:
+                del self.page_cache[key]
+        else:
+            self.chunks.append(df)
+            offsets = np.append(offsets, offsets[-1] + len(df))
+        self.chunk_offsets = offsets
+
+    def read_chunk(self, chunk_index, columns):
+        chunk = self.chunks[chunk_index]
+        return [chunk.iloc[:, column] for column in columns]
+
+
+def _fixed_chunk_offsets(num_rows, chunk_size):
+    return np.append(np.arange(0, num_rows, chunk_size), num_rows)
+
+
+class NumpySource(DataSource):
+    """
+    A structured NumPy array, typically memory-mapped from a `.npy` file.
+    """
+
+    CHUNK_SIZE = 100000
+
+    def __init__(self, data, chunk_size=CHUNK_SIZE):
+        DataSource.__init__(self)
+        if not isinstance(data, np.ndarray):
+            data = np.load(data, mmap_mode="r")
+        if data.dtype.names is None:
+            raise ValueError("NumpySource requires a structured array")
+        self.data = data
+        self.columns = pd.Index(data.dtype.names)
+        self.chunk_offsets = _fixed_chunk_offsets(len(data), chunk_size)
+
+    def read_chunk(self, chunk_index, columns):
+        start, stop = self.chunk_offsets[chunk_index], self.chunk_offsets[chunk_index + 1]
+        return [
+            pd.Series(np.asarray(self.data[self.columns[column]][start:stop]), name=self.columns[column])
+            for column in columns
+        ]
+
+    def take(self, rows, columns):
+        # memory-mapped arrays support random access without paging
+        rows = np.asarray(rows, dtype=int)
+        return [
+            pd.Series(self.data[self.columns[column]][rows], name=self.columns[column])
+            for column in columns
+        ]
+
+
+class ParquetSource(DataSource):
+    """
+    A Parquet file, read row group by row group (requires pyarrow).
+    """
+
+    def __init__(self, path):
+        DataSource.__init__(self)
+        import pyarrow.parquet
+        self.parquet_file = pyarrow.parquet.ParquetFile(path)
+        metadata = self.parquet_file.metadata
+        self.columns = pd.Index(self.parquet_file.schema_arrow.names)
+        self.chunk_offsets = np.cumsum(
+            [0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        )
+
+    def read_chunk(self, chunk_index, columns):
+        names = [self.columns[column] for column in columns]
+        table = self.parquet_file.read_row_group(chunk_index, columns=names)
+        df = table.to_pandas()
+        return [df.iloc[:, j] for j in range(len(names))]
+
+
+class ArrowSource(DataSource):
+    """
+    A memory-mapped Arrow IPC (Feather v2) file, read record batch by
+    record batch (requires pyarrow).
+    """
+
+    def __init__(self, path):
+        DataSource.__init__(self)
+        import pyarrow
+        import pyarrow.ipc
+        self.reader = pyarrow.ipc.open_file(pyarrow.memory_map(path, "r"))
+        self.columns = pd.Index(self.reader.schema.names)
+        self.chunk_offsets = np.cumsum(
+            [0] + [self.reader.get_batch(i).num_rows for i in range(self.reader.num_record_batches)]
+        )
+
+    def read_chunk(self, chunk_index, columns):
+        batch = self.reader.get_batch(chunk_index)
+        # pyarrow only accepts Python integers as column positions
+        return [batch.column(int(column)).to_pandas().rename(self.columns[column]) for column in columns]
+
+
+class CsvSource(DataSource):
+    """
+    A CSV file with a header line, read in chunks of lines. Opening the
+    file scans it once to index the byte offsets of the chunks (quoted
+    fields must not contain line breaks). Note that column types are
+    inferred per chunk.
+    """
+
+    CHUNK_SIZE = 100000
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, **read_csv_kwargs):
+        DataSource.__init__(self)
+        self.path = path
+        self.read_csv_kwargs = read_csv_kwargs
+        self.columns = pd.read_csv(path, nrows=0, **read_csv_kwargs).columns
+
+        byte_offsets = []
+        row_offsets = []
+        with open(path, "rb") as f:
+            f.readline()
+            num_rows = 0
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if num_rows % chunk_size == 0:
+                    byte_offsets.append(offset)
+                    row_offsets.append(num_rows)
+                num_rows += 1
+        self.byte_offsets = byte_offsets
+        self.chunk_offsets = np.array(row_offsets + [num_rows])
+
+    def read_chunk(self, chunk_index, columns):
+        num_rows = self.chunk_offsets[chunk_index + 1] - self.chunk_offsets[chunk_index]
+        with open(self.path, "rb") as f:
+            f.seek(self.byte_offsets[chunk_index])
+            df = pd.read_csv(
+                f, header=None, names=list(self.columns), usecols=list(columns),
+                nrows=num_rows, **self.read_csv_kwargs
+            )
+        return [df.iloc[:, j] for j in np.argsort(np.argsort(columns))]
+
+
+def dictionary_encode_columns(df, max_distinct_fraction=MAX_DISTINCT_FRACTION):
+    """
+    Returns a shallow copy of the data frame in which object (string)
+    columns with at most `max_distinct_fraction` distinct values are
+    replaced by ordered categoricals, i.e., integer codes and a table of
+    the distinct values in sorted order. Filters, sorts and histograms of
+    these columns then work on the codes. Other columns are not copied.
+    """
+    if not df.columns.is_unique:
+        return df
+    result = None
+    for name in df.columns:
+        column = df[name]
+        if column.dtype.kind != "O" or isinstance(column.dtype, pd.CategoricalDtype):
+            continue
+        encoded = _dictionary_encode_column(column, max_distinct_fraction)
+        if encoded is not None:
+            if result is None:
+                result = df.copy(deep=False)
+            result[name] = encoded
+    return df if result is None else result
+
+
+def _dictionary_encode_column(column, max_distinct_fraction):
+    try:
+        sample = column.iloc[:CARDINALITY_SAMPLE_SIZE]
+        if sample.nunique() > max_distinct_fraction * len(sample):
+            return None
+        # sorted codes keep the sort order of the values
+        codes, uniques = pd.factorize(column, sort=True)
+    except TypeError:
+        # unhashable values, or values of mixed types which cannot be sorted
+        return None
+    if len(uniques) > max_distinct_fraction * len(column):
+        return None
+    return pd.Series(
+        pd.Categorical.from_codes(codes, uniques, ordered=True), index=column.index, name=column.name
+    )
+
+
+def as_data_source(data, dictionary_encode=False):
+    """
+    Converts the argument of `dfgui.show` into a data source. Supported
+    are data frames, data sources, structured NumPy arrays and paths to
+    `.parquet`, `.arrow`/`.feather`, `.npy` and `.csv` files. Low
+    cardinality string columns of data frames are dictionary encoded if
+    `dictionary_encode` is set (see `dictionary_encode_columns`).
+    """
+    if isinstance(data, DataSource):
+        return data
+    elif isinstance(data, pd.DataFrame):
+        if dictionary_encode:
+            data = dictionary_encode_columns(data)
+        return DataFrameSource(data)
+    elif isinstance(data, np.ndarray):
+        return NumpySource(data)
+
+    path = str(data)
+    extension = path.lower().rsplit(".", 1)[-1]
+    if extension in ("parquet", "pq"):
+        return ParquetSource(path)
+    elif extension in ("arrow", "feather", "ipc"):
+        return ArrowSource(path)
+    elif extension == "npy":
+        return NumpySource(path)
+    elif extension in ("csv", "tsv", "txt"):
+        return CsvSource(path, sep="\t" if extension == "tsv" else ",")
+    raise ValueError("Unsupported data: {!r}".format(data))
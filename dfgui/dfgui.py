@@ -13,204 +13,414 @@ except ImportError:
     ]
     import wx
 
-import matplotlib
-matplotlib.use('WXAgg')
-from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
-from matplotlib.backends.backend_wx import NavigationToolbar2Wx
-from matplotlib.figure import Figure
-from bisect import bisect
+import threading
+import time
 
 import numpy as np
 import pandas as pd
 
-# unused import required to allow 'eval' of date filters
-import datetime
-from datetime import date
-
-# try to get nicer plotting styles
-try:
-    import seaborn
-    seaborn.set()
-except ImportError:
+from dfgui import plot_data
+from dfgui.aggregation import AGGREGATIONS, GroupByAggregation
+from dfgui.data_source import DataFrameSource, StreamingSource, as_data_source
+from dfgui.engine import DataFrameViewModel, display_columns
+from dfgui.export import EXPORT_FORMATS, export_selection, selection_to_text
+from dfgui.formatting import typical_text_length
+from dfgui.profiling import profiler
+from dfgui.statistics import ColumnStatistics, STATISTICS
+
+# The plotting stack is slow to import and only required by the plot
+# panels, so it is imported by `import_plotting` on first use.
+Figure = None
+FigureCanvas = None
+NavigationToolbar2Wx = None
+LogNorm = None
+mdates = None
+
+
+def import_plotting():
+    """
+    Imports matplotlib (using the WXAgg backend) and sets up the plot style.
+    """
+    global Figure, FigureCanvas, NavigationToolbar2Wx, LogNorm, mdates
+    if Figure is not None:
+        return
+
+    import matplotlib
+    matplotlib.use('WXAgg')
+    from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
+    from matplotlib.backends.backend_wx import NavigationToolbar2Wx
+    from matplotlib import dates as mdates
+    from matplotlib.colors import LogNorm
+    from matplotlib.figure import Figure
+
+    # try to get nicer plotting styles
     try:
-        from matplotlib import pyplot as plt
-        plt.style.use('ggplot')
-    except AttributeError:
-        pass
+        import seaborn
+        seaborn.set()
+    except ImportError:
+        try:
+            from matplotlib import pyplot as plt
+            plt.style.use('ggplot')
+        except AttributeError:
+            pass
+
+
+def set_clipboard_text(text):
+    clipdata = wx.TextDataObject()
+    clipdata.SetText(text)
+    wx.TheClipboard.Open()
+    wx.TheClipboard.SetData(clipdata)
+    wx.TheClipboard.Close()
 
 
 class ListCtrlDataFrame(wx.ListCtrl):
+    """
+    Virtual list control displaying a `DataFrameViewModel`. The control
+    only transfers the selection, column widths and user input between
+    wx and the model.
+    """
 
-    # TODO: we could do something more sophisticated to come
-    # TODO: up with a reasonable column width...
-    DEFAULT_COLUMN_WIDTH = 100
-    TMP_SELECTION_COLUMN = 'tmp_selection_column'
+    MIN_COLUMN_WIDTH = 40
+    MAX_COLUMN_WIDTH = 300
+    # selections above this size are exported instead of copied
+    MAX_COPY_ROWS = 100000
 
-    def __init__(self, parent, df, status_bar_callback):
+    def __init__(self, parent, source, status_bar_callback, filter_threads=None, column_indexes=None):
         wx.ListCtrl.__init__(
             self, parent, -1,
             style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_HRULES | wx.LC_VRULES | wx.LB_MULTIPLE
         )
         self.status_bar_callback = status_bar_callback
 
-        self.df_orig = df
-        self.original_columns = self.df_orig.columns[:]
-        if isinstance(self.original_columns,(pd.RangeIndex,pd.Int64Index)):
-            # RangeIndex is not supported by self._update_columns
-            self.original_columns = pd.Index([str(i) for i in self.original_columns])
-        self.current_columns = self.df_orig.columns[:]
+        self.model = DataFrameViewModel(
+            source, filter_threads=filter_threads, column_indexes=column_indexes
+        )
+        self.current_columns = self.model.columns[:]
 
-        self.sort_by_column = None
+        # column widths per column position, either estimated from a
+        # sample of the values or set by dragging the column header
+        self.auto_column_widths = {}
+        self.user_column_widths = {}
+        # cumulative pixel offsets of the column boundaries, for hit testing
+        self.column_offsets = np.array([0])
 
-        self._reset_mask()
+        self.export_thread = None
 
         # prepare attribute for alternating colors of rows
         self.attr_light_blue = wx.ListItemAttr()
         self.attr_light_blue.SetBackgroundColour("#D6EBFF")
 
         self.Bind(wx.EVT_LIST_COL_CLICK, self._on_col_click)
+        self.Bind(wx.EVT_LIST_COL_END_DRAG, self._on_col_end_drag)
         self.Bind(wx.EVT_RIGHT_DOWN, self._on_right_click)
+        self.Bind(wx.EVT_KEY_DOWN, self._on_key_down)
 
-        self.df = pd.DataFrame({})  # init empty to force initial update
-        self._update_rows()
-        self._update_columns(self.original_columns)
+        self._update_columns(self.model.columns)
+        self.status_bar_callback(0, "Number of rows: {}".format(len(self.model)))
 
-    def _reset_mask(self):
-        #self.mask = [True] * self.df_orig.shape[0]
-        self.mask = pd.Series([True] * self.df_orig.shape[0], index=self.df_orig.index)
+    @property
+    def source(self):
+        return self.model.source
+
+    @property
+    def view(self):
+        return self.model.view
+
+    @property
+    def mask(self):
+        return self.model.mask
+
+    @property
+    def original_columns(self):
+        return self.model.columns
 
     def _update_columns(self, columns):
         self.ClearAll()
         for i, col in enumerate(columns):
             self.InsertColumn(i, col)
-            self.SetColumnWidth(i, self.DEFAULT_COLUMN_WIDTH)
+            self.SetColumnWidth(i, self._get_column_width(self.view.columns[i], col))
         # Note that we have to reset the count as well because ClearAll()
         # not only deletes columns but also the count...
-        self.SetItemCount(len(self.df))
+        self.SetItemCount(len(self.model))
+        self._update_column_offsets()
+
+    def _update_column_offsets(self):
+        """
+        Recomputes the column offsets, which is only necessary when the
+        columns are resized, reordered or projected.
+        """
+        widths = [self.GetColumnWidth(i) for i in range(self.GetColumnCount())]
+        self.column_offsets = np.cumsum([0] + widths)
+
+    def get_column_at(self, x):
+        """
+        Returns the position of the displayed column at the x coordinate
+        (relative to the control), or -1 if there is no column.
+        """
+        # the scroll pixel units may change without the columns changing
+        # (e.g. when the scroll bar appears), so they are read at click time
+        scroll_unit_x = self.GetMainWindow().GetScrollPixelsPerUnit()[0]
+        x_content = x + self.GetScrollPos(wx.HORIZONTAL) * scroll_unit_x
+        col = int(np.searchsorted(self.column_offsets, x_content, side="right")) - 1
+        return col if 0 <= col < len(self.column_offsets) - 1 else -1
+
+    def _get_column_width(self, column, name):
+        """
+        Returns the width of the column at the given position. Unless the
+        user has resized the column, the width is estimated once from the
+        header and a sample of the formatted values.
+        """
+        if column in self.user_column_widths:
+            return self.user_column_widths[column]
+        if column not in self.auto_column_widths:
+            num_chars = max(len(str(name)), typical_text_length(self.source, column))
+            width = (num_chars + 2) * self.GetCharWidth()
+            self.auto_column_widths[column] = max(self.MIN_COLUMN_WIDTH, min(self.MAX_COLUMN_WIDTH, width))
+        return self.auto_column_widths[column]
+
+    def _on_col_end_drag(self, event):
+        # the new width is only available after the event has been processed
+        wx.CallAfter(self._store_column_width, event.GetColumn())
+        event.Skip()
+
+    def _store_column_width(self, col):
+        if 0 <= col < len(self.view.columns):
+            self.user_column_widths[self.view.columns[col]] = self.GetColumnWidth(col)
+        self._update_column_offsets()
 
     def set_columns(self, columns_to_use):
         """
         External interface to set the column projections.
         """
         self.current_columns = columns_to_use
-        self._update_rows()
+        self.model.set_columns(columns_to_use)
         self._update_columns(columns_to_use)
 
     def _update_rows(self):
-        old_len = len(self.df)
-        self.df = self.df_orig.loc[self.mask.values, self.current_columns]
-        new_len = len(self.df)
+        old_len = len(self.model)
+        self._read_selection()
+        self.model.update_rows()
+        self._show_rows(old_len)
+
+    def _show_rows(self, old_len):
+        new_len = len(self.model)
         if old_len != new_len:
             self.SetItemCount(new_len)
             self.status_bar_callback(0, "Number of rows: {}".format(new_len))
+        self._apply_selection()
+        self.Refresh()
 
     def apply_filter(self, conditions):
         """
         External interface to set a filter.
         """
-        old_mask = self.mask.copy()
+        mask, errors = self.compute_mask(conditions)
+        return self.set_mask(conditions, mask, errors)
 
-        if len(conditions) == 0:
-            self._reset_mask()
-
-        else:
-            self._reset_mask()  # set all to True for destructive conjunction
-
-            no_error = True
-            for column, condition in conditions:
-                if condition.strip() == '':
-                    continue
-                condition = condition.replace("_", "self.df_orig['{}']".format(column))
-                print("Evaluating condition:", condition)
-                try:
-                    tmp_mask = eval(condition)
-                    if isinstance(tmp_mask, pd.Series) and tmp_mask.dtype == np.bool:
-                        self.mask &= tmp_mask
-                except Exception as e:
-                    print("Failed with:", e)
-                    no_error = False
-                    self.status_bar_callback(
-                        1,
-                        "Evaluating '{}' failed with: {}".format(condition, e)
-                    )
-
-            if no_error:
-                self.status_bar_callback(1, "")
+    def compute_mask(self, conditions, is_cancelled=None):
+        """
+        See `DataFrameViewModel.compute_mask`, which does not touch any
+        widgets and can therefore run on a worker thread.
+        """
+        return self.model.compute_mask(conditions, is_cancelled)
 
-        has_changed = any(old_mask != self.mask)
+    def set_mask(self, conditions, mask, errors):
+        """
+        Applies a mask computed by `compute_mask` for the given conditions.
+        """
+        for condition, e in errors:
+            self.status_bar_callback(
+                1,
+                "Evaluating '{}' failed with: {}".format(condition, e)
+            )
+        if len(errors) == 0:
+            self.status_bar_callback(1, "")
+
+        old_len = len(self.model)
+        self._read_selection()
+        has_changed = self.model.set_mask(conditions, mask)
         if has_changed:
-            self._update_rows()
+            self._show_rows(old_len)
 
-        return len(self.df), has_changed
+        return len(self.model), has_changed
+
+    def append_rows(self, df):
+        """
+        Appends the rows of a data frame to the source, which has to be a
+        StreamingSource (see `DataFrameViewModel.append_rows`).
+        """
+        old_len = len(self.model)
+        self._read_selection()
+        self.model.append_rows(df)
+        self._show_rows(old_len)
 
     def get_selected_items(self):
         """
         Gets the selected items for the list control.
-        Selection is returned as a list of selected indices,
+        Selection is returned as an array of selected indices,
         low to high.
         """
-        selection = []
-        current = -1    # start at -1 to get the first selected item
-        while True:
-            next = self.GetNextItem(current, wx.LIST_NEXT_ALL, wx.LIST_STATE_SELECTED)
-            if next == -1:
-                return selection
+        self._read_selection()
+        return self.model.get_selected_items()
+
+    def _read_selection(self):
+        """
+        Transfers the selection of the list control into the view model.
+        No selection and all rows selected are detected in one call, any
+        other selection costs one GetNextItem call per selected row.
+        """
+        count = self.GetSelectedItemCount()
+        if count == 0:
+            items = np.array([], dtype=int)
+        elif count == len(self.model):
+            items = np.arange(len(self.model))
+        else:
+            items = np.empty(count, dtype=int)
+            current = -1    # start at -1 to get the first selected item
+            for i in range(count):
+                current = self.GetNextItem(current, wx.LIST_NEXT_ALL, wx.LIST_STATE_SELECTED)
+                items[i] = current
+        self.model.set_selected_items(items)
+
+    def _apply_selection(self):
+        """
+        Transfers the selection of the view model into the list control.
+        Selecting no rows or all rows is a single call. wx has no call to
+        select a set of rows of a virtual list, so any other selection
+        costs one Select call per selected (or, for selections of more
+        than half of the rows, per unselected) row.
+        """
+        items = self.model.get_selected_items()
+        num_rows = len(self.model)
+        self.Freeze()
+        try:
+            # for virtual lists, item -1 (de)selects all items in one call
+            if len(items) > num_rows // 2:
+                self.SetItemState(-1, wx.LIST_STATE_SELECTED, wx.LIST_STATE_SELECTED)
+                selected = np.zeros(num_rows, dtype=bool)
+                selected[items] = True
+                for i in np.flatnonzero(~selected):
+                    self.Select(int(i), on=False)
             else:
-                selection.append(next)
-                current = next
+                self.SetItemState(-1, 0, wx.LIST_STATE_SELECTED)
+                for i in items:
+                    self.Select(int(i), on=True)
+        finally:
+            self.Thaw()
 
     def get_filtered_df(self):
-        return self.df_orig.loc[self.mask, :]
+        """
+        Materializes all rows passing the filter (in source order).
+        """
+        return self.model.get_filtered_df()
 
-    def _on_col_click(self, event):
+    def get_filtered_column(self, column):
         """
-        Sort data frame by selected column.
+        Returns the values of the column at the given position for all
+        rows passing the filter.
         """
-        # get currently selected items
-        selected = self.get_selected_items()
+        return self.model.get_filtered_column(column)
 
-        # append a temporary column to store the currently selected items
-        self.df[self.TMP_SELECTION_COLUMN] = False
-        self.df.iloc[selected, -1] = True
+    def get_export_rows(self):
+        """
+        Returns the source rows to copy or export: the selected rows in
+        display order, or all displayed rows if nothing is selected.
+        """
+        self._read_selection()
+        return self.model.get_export_rows()
 
-        # get column name to use for sorting
-        col = event.GetColumn()
+    def copy_selection(self):
+        """
+        Copies the selected rows of the displayed columns into the
+        clipboard as tab separated values (pasteable into spreadsheets).
+        The text is built on the GUI thread, therefore only an explicit
+        selection of at most MAX_COPY_ROWS rows is copied; all rows or
+        larger selections can be exported in the background instead.
+        """
+        self._read_selection()
+        rows = self.model.get_selected_rows()
+        if len(rows) == 0:
+            self.status_bar_callback(1, "No rows selected (Ctrl+S exports all rows)")
+            return
+        if len(rows) > self.MAX_COPY_ROWS:
+            self.status_bar_callback(
+                1, "Cannot copy {} rows (at most {}), use Ctrl+S to export them".format(len(rows), self.MAX_COPY_ROWS)
+            )
+            return
+        set_clipboard_text(selection_to_text(self.source, rows, self.view.columns))
+        self.status_bar_callback(1, "Copied {} rows".format(len(rows)))
+
+    def export_selection(self, path, file_format=None):
+        """
+        Exports the selected rows of the displayed columns to a TSV, CSV
+        or Parquet file. The file is written chunk by chunk on a worker
+        thread, reporting the progress in the status bar.
+        """
+        if self.export_thread is not None and self.export_thread.is_alive():
+            self.status_bar_callback(1, "Another export is still running")
+            return
+        rows = self.get_export_rows()
+        columns = self.view.columns
+
+        def report_progress(fraction):
+            wx.CallAfter(self.status_bar_callback, 1, "Exporting... {:.0%}".format(fraction))
+
+        def run():
+            try:
+                export_selection(
+                    self.source, rows, columns, path, file_format, progress_callback=report_progress
+                )
+                message = "Exported {} rows to {}".format(len(rows), path)
+            except Exception as e:
+                message = "Export failed: {}".format(e)
+            wx.CallAfter(self.status_bar_callback, 1, message)
+
+        self.status_bar_callback(1, "Exporting...")
+        self.export_thread = threading.Thread(target=run)
+        self.export_thread.daemon = True
+        self.export_thread.start()
+
+    def _show_export_dialog(self):
+        wildcard = "TSV files (*.tsv)|*.tsv|CSV files (*.csv)|*.csv|Parquet files (*.parquet)|*.parquet"
+        dialog = wx.FileDialog(
+            self, "Export selection", wildcard=wildcard, style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
+        )
+        if dialog.ShowModal() == wx.ID_OK:
+            self.export_selection(dialog.GetPath(), EXPORT_FORMATS[dialog.GetFilterIndex()])
+        dialog.Destroy()
 
-        # determine if ascending or descending
-        if self.sort_by_column is None or self.sort_by_column[0] != col:
-            ascending = True
+    def _on_key_down(self, event):
+        """
+        Ctrl+C copies the selection into the clipboard, Ctrl+S exports it
+        to a file.
+        """
+        if event.ControlDown() and event.GetKeyCode() == ord('C'):
+            self.copy_selection()
+        elif event.ControlDown() and event.GetKeyCode() == ord('S'):
+            self._show_export_dialog()
         else:
-            ascending = not self.sort_by_column[1]
-
-        # store sort column and sort direction
-        self.sort_by_column = (col, ascending)
+            event.Skip()
 
-        try:
-            # pandas 0.17
-            self.df.sort_values(self.df.columns[col], inplace=True, ascending=ascending)
-        except AttributeError:
-            # pandas 0.16 compatibility
-            self.df.sort(self.df.columns[col], inplace=True, ascending=ascending)
-
-        # deselect all previously selected
-        for i in selected:
-            self.Select(i, on=False)
-
-        # determine indices of selection after sorting
-        selected_bool = self.df.iloc[:, -1] == True
-        selected = self.df.reset_index().index[selected_bool]
+    def _on_col_click(self, event):
+        """
+        Sort data frame by selected column. Shift click sorts by multiple
+        columns.
+        """
+        # store the current selection in the view model, which is
+        # independent of the row order
+        self._read_selection()
 
-        # select corresponding rows
-        for i in selected:
-            self.Select(i, on=True)
+        # shift click adds a further sort key (or toggles an existing one)
+        self.model.toggle_sort(event.GetColumn(), add_key=wx.GetKeyState(wx.WXK_SHIFT))
+        self._apply_selection()
 
-        # delete temporary column
-        del self.df[self.TMP_SELECTION_COLUMN]
+        self.Refresh()
 
     def _on_right_click(self, event):
         """
         Copies a cell into clipboard on right click. Unfortunately,
-        determining the clicked column is not straightforward. This
+        determining the clicked column is not straightforward (see
+        `get_column_at`). This
         appraoch is inspired by the TextEditMixin in:
         /usr/lib/python2.7/dist-packages/wx-2.8-gtk2-unicode/wx/lib/mixins/listctrl.py
         More references:
@@ -218,38 +428,18 @@ class ListCtrlDataFrame(wx.ListCtrl):
         - https://groups.google.com/forum/#!topic/wxpython-users/7BNl9TA5Y5U
         - https://groups.google.com/forum/#!topic/wxpython-users/wyayJIARG8c
         """
-        if self.HitTest(event.GetPosition()) != wx.NOT_FOUND:
-            x, y = event.GetPosition()
-            row, flags = self.HitTest((x, y))
-
-            col_locs = [0]
-            loc = 0
-            for n in range(self.GetColumnCount()):
-                loc = loc + self.GetColumnWidth(n)
-                col_locs.append(loc)
-
-            scroll_pos = self.GetScrollPos(wx.HORIZONTAL)
-            # this is crucial step to get the scroll pixel units
-            unit_x, unit_y = self.GetMainWindow().GetScrollPixelsPerUnit()
-
-            col = bisect(col_locs, x + scroll_pos * unit_x) - 1
-
-            value = self.df.iloc[row, col]
-            # print(row, col, scroll_pos, value)
-
-            clipdata = wx.TextDataObject()
-            clipdata.SetText(str(value))
-            wx.TheClipboard.Open()
-            wx.TheClipboard.SetData(clipdata)
-            wx.TheClipboard.Close()
+        x, y = event.GetPosition()
+        row, flags = self.HitTest((x, y))
+        col = self.get_column_at(x)
+        if row != wx.NOT_FOUND and col >= 0:
+            value = self.model.get_value(row, col)
+            set_clipboard_text(str(value))
 
     def OnGetItemText(self, item, col):
         """
         Implements the item getter for a "virtual" ListCtrl.
         """
-        value = self.df.iloc[item, col]
-        # print("retrieving %d %d %s" % (item, col, value))
-        return str(value)
+        return self.model.get_text(item, col)
 
     def OnGetItemAttr(self, item):
         """
@@ -265,10 +455,12 @@ class DataframePanel(wx.Panel):
     """
     Panel providing the main data frame table view.
     """
-    def __init__(self, parent, df, status_bar_callback):
+    def __init__(self, parent, source, status_bar_callback, filter_threads=None, column_indexes=None):
         wx.Panel.__init__(self, parent)
 
-        self.df_list_ctrl = ListCtrlDataFrame(self, df, status_bar_callback)
+        self.df_list_ctrl = ListCtrlDataFrame(
+            self, source, status_bar_callback, filter_threads, column_indexes
+        )
 
         sizer = wx.BoxSizer(wx.VERTICAL)
         sizer.Add(self.df_list_ctrl, 1, wx.ALL | wx.EXPAND | wx.GROW, 5)
@@ -284,10 +476,8 @@ class ListBoxDraggable(wx.ListBox):
 
         wx.ListBox.__init__(self, parent, size, **kwargs)
 
-        if isinstance(data,(pd.RangeIndex,pd.Int64Index)):
-            # RangeIndex is not supported by self._update_columns
-            data = pd.Index([str(i) for i in data])
-        self.data = data
+        # integer column labels are not supported by self._update_columns
+        self.data = display_columns(data)
 
         self.InsertItems(self.data, 0)
 
@@ -396,6 +586,82 @@ class ColumnSelectionPanel(wx.Panel):
         self.df_list_ctrl.set_columns(selected)
 
 
+class FilterScheduler(object):
+    """
+    Debounces filter changes and evaluates the filter mask on a worker
+    thread. Evaluations which are superseded by newer input are dropped,
+    and the result of the latest evaluation is applied on the main thread.
+    """
+
+    DEBOUNCE_DELAY_MS = 250
+    PROGRESS_INTERVAL_MS = 100
+
+    def __init__(self, parent, df_list_ctrl, result_callback):
+        self.df_list_ctrl = df_list_ctrl
+        self.result_callback = result_callback
+
+        self.generation = 0
+        self.start_time = None
+        self.debounce_call = None
+
+        self.progress_timer = wx.Timer(parent)
+        parent.Bind(wx.EVT_TIMER, self.on_progress_timer, self.progress_timer)
+
+    def schedule(self, conditions):
+        """
+        Requests the evaluation of the given conditions. Any pending or
+        running evaluation becomes stale.
+        """
+        self.generation += 1
+        if self.debounce_call is not None and self.debounce_call.IsRunning():
+            self.debounce_call.Restart(self.DEBOUNCE_DELAY_MS, self.generation, conditions)
+        else:
+            self.debounce_call = wx.CallLater(self.DEBOUNCE_DELAY_MS, self._start, self.generation, conditions)
+
+    def _start(self, generation, conditions):
+        if generation != self.generation:
+            return
+        if self.start_time is None:
+            self.start_time = time.time()
+            self.progress_timer.Start(self.PROGRESS_INTERVAL_MS)
+            self._show_progress()
+        thread = threading.Thread(target=self._run, args=(generation, conditions))
+        thread.daemon = True
+        thread.start()
+
+    def _run(self, generation, conditions):
+        def is_cancelled():
+            return generation != self.generation
+        try:
+            result = self.df_list_ctrl.compute_mask(conditions, is_cancelled)
+        except Exception as e:
+            print("Filter evaluation failed with:", e)
+            result = None
+        wx.CallAfter(self._finish, generation, conditions, result)
+
+    def _finish(self, generation, conditions, result):
+        if generation != self.generation:
+            # a newer evaluation is pending or running
+            return
+        self.progress_timer.Stop()
+        self.start_time = None
+        self.df_list_ctrl.status_bar_callback(1, "")
+        if result is not None:
+            mask, errors = result
+            num_matching, has_changed = self.df_list_ctrl.set_mask(conditions, mask, errors)
+            self.result_callback(has_changed)
+
+    def on_progress_timer(self, event):
+        self._show_progress()
+
+    def _show_progress(self):
+        if self.start_time is not None:
+            self.df_list_ctrl.status_bar_callback(
+                1,
+                "Filtering... {:.1f} s".format(time.time() - self.start_time)
+            )
+
+
 class FilterPanel(wx.Panel):
     """
     Panel for defining filter expressions.
@@ -410,6 +676,8 @@ class FilterPanel(wx.Panel):
 
         self.num_filters = 10
 
+        self.filter_scheduler = FilterScheduler(self, df_list_ctrl, self.on_filter_applied)
+
         self.main_sizer = wx.BoxSizer(wx.VERTICAL)
 
         self.combo_boxes = []
@@ -448,23 +716,157 @@ class FilterPanel(wx.Panel):
                 # since we have added a dummy column for "deselect", we have to subtract one
                 column = self.columns[column_index - 1]
                 conditions += [(column, condition)]
-        num_matching, has_changed = self.df_list_ctrl.apply_filter(conditions)
+        self.filter_scheduler.schedule(conditions)
+
+    def on_filter_applied(self, has_changed):
         if has_changed:
             self.change_callback()
-        # print("Num matching:", num_matching)
 
 
-class HistogramPlot(wx.Panel):
+class DeferredRedrawPanel(wx.Panel):
     """
-    Panel providing a histogram plot.
+    Base class of panels which only redraw while they are visible.
+    Subclasses implement `redraw`.
     """
-    def __init__(self, parent, columns, df_list_ctrl):
+    def __init__(self, parent):
         wx.Panel.__init__(self, parent)
+        self.needs_redraw = False
+
+    def request_redraw(self):
+        """
+        Redraws the panel if it is visible, otherwise the redraw is
+        deferred until the panel is shown.
+        """
+        if self.IsShownOnScreen():
+            self.needs_redraw = False
+            self._measured_redraw()
+        else:
+            self.needs_redraw = True
+
+    def redraw_if_needed(self):
+        if self.needs_redraw:
+            self.needs_redraw = False
+            self._measured_redraw()
+
+    def _measured_redraw(self):
+        with profiler.measure("redraw " + type(self).__name__):
+            self.redraw()
+
+    def redraw(self):
+        raise NotImplementedError
+
+
+class GroupByPanel(DeferredRedrawPanel):
+    """
+    Panel providing group-by aggregations of the filtered rows. The
+    aggregation is computed on a worker thread, and the result is shown
+    in a data frame view of its own.
+    """
+    def __init__(self, parent, columns, df_list_ctrl):
+        DeferredRedrawPanel.__init__(self, parent)
+
+        self.columns = columns
+        self.df_list_ctrl = df_list_ctrl
+        self.aggregation = GroupByAggregation(df_list_ctrl.source)
+        self.generation = 0
+
+        self.key_list_box = wx.ListBox(self, choices=list(columns), style=wx.LB_EXTENDED)
+        self.value_list_box = wx.ListBox(self, choices=list(columns), style=wx.LB_EXTENDED)
+        self.aggregation_list_box = wx.ListBox(self, choices=AGGREGATIONS, style=wx.LB_EXTENDED)
+        self.aggregation_list_box.SetSelection(AGGREGATIONS.index("count"))
+        self.Bind(wx.EVT_LISTBOX, self.on_selection_changed)
+
+        selection_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        for label, list_box in [
+            ("Group by", self.key_list_box),
+            ("Values", self.value_list_box),
+            ("Aggregations", self.aggregation_list_box),
+        ]:
+            column_sizer = wx.BoxSizer(wx.VERTICAL)
+            column_sizer.Add(wx.StaticText(self, label=label), 0, wx.ALL, 2)
+            column_sizer.Add(list_box, 1, wx.EXPAND)
+            selection_sizer.Add(column_sizer, 1, wx.ALL | wx.EXPAND, 5)
+
+        self.result_label = wx.StaticText(self, label="")
+        self.result_list_ctrl = None
+
+        self.main_sizer = wx.BoxSizer(wx.VERTICAL)
+        self.main_sizer.Add(selection_sizer, 1, wx.EXPAND)
+        self.main_sizer.Add(self.result_label, 0, wx.ALL, 5)
+        self.SetSizer(self.main_sizer)
+
+    def on_selection_changed(self, event):
+        self.request_redraw()
+
+    def result_status_callback(self, i, new_text):
+        if i == 0:
+            self.result_label.SetLabel(new_text.replace("Number of rows", "Number of groups"))
+        else:
+            self.df_list_ctrl.status_bar_callback(i, new_text)
+
+    def redraw(self):
+        self.generation += 1
+        keys = list(self.key_list_box.GetSelections())
+        values = list(self.value_list_box.GetSelections())
+        aggregations = [AGGREGATIONS[i] for i in self.aggregation_list_box.GetSelections()]
+        if len(keys) == 0:
+            self.show_result(self.generation, None)
+            return
+
+        mask = self.df_list_ctrl.mask
+        result = self.aggregation.get_cached(mask, keys, values, aggregations)
+        if result is not None:
+            self.show_result(self.generation, result)
+            return
+
+        self.df_list_ctrl.status_bar_callback(1, "Aggregating...")
+        thread = threading.Thread(
+            target=self._run, args=(self.generation, mask, keys, values, aggregations)
+        )
+        thread.daemon = True
+        thread.start()
+
+    def _run(self, generation, mask, keys, values, aggregations):
+        try:
+            result = self.aggregation.compute(mask, keys, values, aggregations)
+        except Exception as e:
+            print("Aggregation failed with:", e)
+            result = None
+        wx.CallAfter(self.show_result, generation, result)
+
+    def show_result(self, generation, result):
+        if generation != self.generation:
+            # a newer aggregation has been requested
+            return
+        self.df_list_ctrl.status_bar_callback(1, "")
+        if self.result_list_ctrl is not None:
+            self.main_sizer.Detach(self.result_list_ctrl)
+            self.result_list_ctrl.Destroy()
+            self.result_list_ctrl = None
+            self.result_label.SetLabel("")
+        if result is not None:
+            self.result_list_ctrl = ListCtrlDataFrame(
+                self, DataFrameSource(result), self.result_status_callback
+            )
+            self.main_sizer.Add(self.result_list_ctrl, 2, wx.ALL | wx.EXPAND | wx.GROW, 5)
+        self.Layout()
+
+
+class HistogramPlot(DeferredRedrawPanel):
+    """
+    Panel providing a histogram plot. The binning of each column is
+    computed once by the model, filter changes only require counting the
+    bins of the rows in the current mask.
+    """
+
+    def __init__(self, parent, columns, df_list_ctrl):
+        DeferredRedrawPanel.__init__(self, parent)
 
         columns_with_neutral_selection = [''] + list(columns)
         self.columns = columns
         self.df_list_ctrl = df_list_ctrl
 
+        import_plotting()
         self.figure = Figure(facecolor="white", figsize=(1, 1))
         self.axes = self.figure.add_subplot(111)
         self.canvas = FigureCanvas(self, -1, self.figure)
@@ -493,47 +895,65 @@ class HistogramPlot(wx.Panel):
             # subtract one to remove the neutral selection index
             column_index1 -= 1
 
-            df = self.df_list_ctrl.get_filtered_df()
+            binning, counts = self.df_list_ctrl.model.get_histogram(column_index1)
 
-            if len(df) > 0:
+            if counts.sum() > 0:
                 self.axes.clear()
 
-                column = df.iloc[:, column_index1]
-                is_string_col = column.dtype == np.object and isinstance(column.values[0], str)
-                if is_string_col:
-                    value_counts = column.value_counts().sort_index()
-                    value_counts.plot(kind='bar', ax=self.axes)
+                if binning.is_discrete:
+                    # only show the values occurring in the filtered rows
+                    non_empty = np.flatnonzero(counts)
+                    self.axes.bar(np.arange(len(non_empty)), counts[non_empty], align='center')
+                    self.axes.set_xticks(np.arange(len(non_empty)))
+                    self.axes.set_xticklabels([binning.labels[i] for i in non_empty], rotation=90)
                 else:
-                    self.axes.hist(column.values, bins=100)
+                    edges = binning.edge_values()
+                    if binning.is_datetime:
+                        edges = mdates.date2num(pd.to_datetime(edges).to_pydatetime())
+                        self.axes.xaxis_date()
+                    self.axes.bar(edges[:-1], counts, width=np.diff(edges), align='edge')
 
                 self.canvas.draw()
 
 
-class ScatterPlot(wx.Panel):
+class ScatterPlot(DeferredRedrawPanel):
     """
-    Panel providing a scatter plot.
+    Panel providing a scatter plot. Above `max_points` points, the
+    "Auto" mode renders a density raster instead of individual points.
     """
-    def __init__(self, parent, columns, df_list_ctrl):
-        wx.Panel.__init__(self, parent)
+
+    MODES = plot_data.SCATTER_MODES
+    MAX_POINTS = 100000
+    DENSITY_BINS = 256
+
+    def __init__(self, parent, columns, df_list_ctrl, max_points=MAX_POINTS):
+        DeferredRedrawPanel.__init__(self, parent)
 
         columns_with_neutral_selection = [''] + list(columns)
         self.columns = columns
         self.df_list_ctrl = df_list_ctrl
 
+        import_plotting()
         self.figure = Figure(facecolor="white", figsize=(1, 1))
         self.axes = self.figure.add_subplot(111)
         self.canvas = FigureCanvas(self, -1, self.figure)
 
         chart_toolbar = NavigationToolbar2Wx(self.canvas)
 
+        self.max_points = max_points
+
         self.combo_box1 = wx.ComboBox(self, choices=columns_with_neutral_selection, style=wx.CB_READONLY)
         self.combo_box2 = wx.ComboBox(self, choices=columns_with_neutral_selection, style=wx.CB_READONLY)
+        self.mode_choice = wx.Choice(self, choices=self.MODES)
+        self.mode_choice.SetSelection(0)
 
         self.Bind(wx.EVT_COMBOBOX, self.on_combo_box_select)
+        self.Bind(wx.EVT_CHOICE, self.on_combo_box_select, self.mode_choice)
 
         row_sizer = wx.BoxSizer(wx.HORIZONTAL)
         row_sizer.Add(self.combo_box1, 0, wx.ALL | wx.ALIGN_CENTER, 5)
         row_sizer.Add(self.combo_box2, 0, wx.ALL | wx.ALIGN_CENTER, 5)
+        row_sizer.Add(self.mode_choice, 0, wx.ALL | wx.ALIGN_CENTER, 5)
         row_sizer.Add(chart_toolbar, 0, wx.ALL, 5)
 
         sizer = wx.BoxSizer(wx.VERTICAL)
@@ -552,7 +972,10 @@ class ScatterPlot(wx.Panel):
             # subtract one to remove the neutral selection index
             column_index1 -= 1
             column_index2 -= 1
-            df = self.df_list_ctrl.get_filtered_df()
+            mode = self.MODES[self.mode_choice.GetSelection()]
+            data = self.df_list_ctrl.model.get_scatter(
+                column_index1, column_index2, mode, self.max_points, self.DENSITY_BINS
+            )
 
             # It looks like using pandas dataframe.plot causes something weird to
             # crash in wx internally. Therefore we use plain axes.plot functionality.
@@ -560,18 +983,91 @@ class ScatterPlot(wx.Panel):
             # column_name2 = self.columns[column_index2]
             # df.plot(kind='scatter', x=column_name1, y=column_name2)
 
-            if len(df) > 0:
+            if data.num_points > 0:
                 self.axes.clear()
-                self.axes.plot(df.iloc[:, column_index1].values, df.iloc[:, column_index2].values, 'o', clip_on=False)
+
+                if data.mode == "Density":
+                    self.axes.imshow(
+                        np.ma.masked_equal(data.counts.T, 0), origin='lower', extent=data.extent,
+                        aspect='auto', interpolation='nearest', norm=LogNorm()
+                    )
+                    self.axes.set_title("Density of {:,} points".format(data.num_points), fontsize="small")
+                else:
+                    self.axes.plot(data.x, data.y, 'o', clip_on=False)
+                    if data.mode == "Sample":
+                        self.axes.set_title(
+                            "{:,} of {:,} points shown".format(len(data.x), data.num_points), fontsize="small"
+                        )
 
                 self.canvas.draw()
 
 
+class StatisticsPanel(DeferredRedrawPanel):
+    """
+    Panel providing summary statistics of all columns of the filtered rows.
+    """
+    def __init__(self, parent, df_list_ctrl):
+        DeferredRedrawPanel.__init__(self, parent)
+
+        self.df_list_ctrl = df_list_ctrl
+        self.column_statistics = ColumnStatistics(df_list_ctrl.source)
+
+        self.list_ctrl = wx.ListCtrl(self, -1, style=wx.LC_REPORT | wx.LC_HRULES | wx.LC_VRULES)
+        self.list_ctrl.InsertColumn(0, "Column")
+        for i, name in enumerate(STATISTICS):
+            self.list_ctrl.InsertColumn(i + 1, name)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.list_ctrl, 1, wx.ALL | wx.EXPAND | wx.GROW, 5)
+        self.SetSizer(sizer)
+
+        # draw on first display
+        self.needs_redraw = True
+
+    @staticmethod
+    def format_value(value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return ""
+        elif isinstance(value, (float, np.floating)):
+            return "{:.6g}".format(value)
+        return str(value)
+
+    def redraw(self):
+        stats = self.column_statistics.compute(self.df_list_ctrl.mask)
+        self.list_ctrl.DeleteAllItems()
+        for i, (column, row) in enumerate(stats.iterrows()):
+            self.list_ctrl.InsertStringItem(i, str(column))
+            for j, value in enumerate(row.values):
+                self.list_ctrl.SetStringItem(i, j + 1, self.format_value(value))
+
+
+class LazyPage(wx.Panel):
+    """
+    Placeholder notebook page which constructs its actual content (via
+    `factory(parent)`) on first activation.
+    """
+    def __init__(self, parent, factory):
+        wx.Panel.__init__(self, parent)
+        self.factory = factory
+        self.content = None
+        self.SetSizer(wx.BoxSizer(wx.VERTICAL))
+
+    def get_content(self):
+        if self.content is None:
+            self.content = self.factory(self)
+            self.GetSizer().Add(self.content, 1, wx.EXPAND)
+            self.Layout()
+        return self.content
+
+
 class MainFrame(wx.Frame):
     """
     The main GUI window.
     """
-    def __init__(self, df):
+
+    PROFILER_INTERVAL_MS = 1000
+
+    def __init__(self, source, filter_threads=None, column_indexes=None):
         wx.Frame.__init__(self, None, -1, "Pandas DataFrame GUI")
 
         # Here we create a panel and a notebook on the panel
@@ -579,26 +1075,42 @@ class MainFrame(wx.Frame):
         nb = wx.Notebook(p)
         self.nb = nb
 
-        columns = df.columns[:]
-        if isinstance(columns,(pd.RangeIndex,pd.Int64Index)):
-            # RangeIndex is not supported
-            columns = pd.Index([str(i) for i in columns])
-        self.CreateStatusBar(2, style=0)
-        self.SetStatusWidths([200, -1])
-
-        # create the page windows as children of the notebook
-        self.page1 = DataframePanel(nb, df, self.status_bar_callback)
-        self.page2 = ColumnSelectionPanel(nb, columns, self.page1.df_list_ctrl)
-        self.page3 = FilterPanel(nb, columns, self.page1.df_list_ctrl, self.selection_change_callback)
-        self.page4 = HistogramPlot(nb, columns, self.page1.df_list_ctrl)
-        self.page5 = ScatterPlot(nb, columns, self.page1.df_list_ctrl)
+        columns = display_columns(source.columns)
+        self.CreateStatusBar(3, style=0)
+        self.SetStatusWidths([200, -1, 0])
+
+        # F12 toggles the profiler readout in the status bar, Shift+F12
+        # exports the profiler data as JSON
+        self.profiler_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_profiler_timer, self.profiler_timer)
+        toggle_id = wx.NewId()
+        export_id = wx.NewId()
+        self.Bind(wx.EVT_MENU, self.on_toggle_profiler, id=toggle_id)
+        self.Bind(wx.EVT_MENU, self.on_export_profiler, id=export_id)
+        self.SetAcceleratorTable(wx.AcceleratorTable([
+            (wx.ACCEL_NORMAL, wx.WXK_F12, toggle_id),
+            (wx.ACCEL_SHIFT, wx.WXK_F12, export_id),
+        ]))
+
+        # create the page windows as children of the notebook; all pages
+        # except for the data frame are only constructed when activated
+        self.page1 = DataframePanel(nb, source, self.status_bar_callback, filter_threads, column_indexes)
+        df_list_ctrl = self.page1.df_list_ctrl
+        self.page2 = LazyPage(nb, lambda parent: ColumnSelectionPanel(parent, columns, df_list_ctrl))
+        self.page3 = LazyPage(nb, lambda parent: FilterPanel(parent, columns, df_list_ctrl, self.selection_change_callback))
+        self.page4 = LazyPage(nb, lambda parent: GroupByPanel(parent, columns, df_list_ctrl))
+        self.page5 = LazyPage(nb, lambda parent: HistogramPlot(parent, columns, df_list_ctrl))
+        self.page6 = LazyPage(nb, lambda parent: ScatterPlot(parent, columns, df_list_ctrl))
+        self.page7 = LazyPage(nb, lambda parent: StatisticsPanel(parent, df_list_ctrl))
 
         # add the pages to the notebook with the label to show on the tab
         nb.AddPage(self.page1, "Data Frame")
         nb.AddPage(self.page2, "Columns")
         nb.AddPage(self.page3, "Filters")
-        nb.AddPage(self.page4, "Histogram")
-        nb.AddPage(self.page5, "Scatter Plot")
+        nb.AddPage(self.page4, "Group By")
+        nb.AddPage(self.page5, "Histogram")
+        nb.AddPage(self.page6, "Scatter Plot")
+        nb.AddPage(self.page7, "Statistics")
 
         nb.Bind(wx.EVT_NOTEBOOK_PAGE_CHANGED, self.on_tab_change)
 
@@ -612,33 +1124,161 @@ class MainFrame(wx.Frame):
         self.Center()
 
     def on_tab_change(self, event):
-        self.page2.list_box.SetFocus()
+        if self.page2.content is not None:
+            self.page2.content.list_box.SetFocus()
         page_to_select = event.GetSelection()
+        page = self.nb.GetPage(page_to_select)
+        if isinstance(page, LazyPage):
+            page.get_content()
         wx.CallAfter(self.fix_focus, page_to_select)
         event.Skip(True)
 
     def fix_focus(self, page_to_select):
         page = self.nb.GetPage(page_to_select)
         page.SetFocus()
+        if isinstance(page, LazyPage):
+            page = page.get_content()
         if isinstance(page, DataframePanel):
-            self.page1.df_list_ctrl.SetFocus()
+            page.df_list_ctrl.SetFocus()
         elif isinstance(page, ColumnSelectionPanel):
-            self.page2.list_box.SetFocus()
+            page.list_box.SetFocus()
+        elif isinstance(page, DeferredRedrawPanel):
+            page.redraw_if_needed()
 
     def status_bar_callback(self, i, new_text):
         self.SetStatusText(new_text, i)
 
+    def on_toggle_profiler(self, event):
+        if self.profiler_timer.IsRunning():
+            self.profiler_timer.Stop()
+            self.SetStatusWidths([200, -1, 0])
+            self.SetStatusText("", 2)
+        else:
+            self.SetStatusWidths([200, -1, -2])
+            self.on_profiler_timer(None)
+            self.profiler_timer.Start(self.PROFILER_INTERVAL_MS)
+
+    def on_profiler_timer(self, event):
+        summary = profiler.format_summary()
+        self.SetStatusText(summary or "No measurements yet", 2)
+        self.GetStatusBar().SetToolTip(summary.replace(" | ", "\n"))
+
+    def on_export_profiler(self, event):
+        dialog = wx.FileDialog(
+            self, "Export profiler data", defaultFile="dfgui_profile.json",
+            wildcard="JSON files (*.json)|*.json", style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
+        )
+        if dialog.ShowModal() == wx.ID_OK:
+            profiler.export_json(dialog.GetPath())
+            self.SetStatusText("Profiler data exported to {}".format(dialog.GetPath()), 1)
+        dialog.Destroy()
+
     def selection_change_callback(self):
-        self.page4.redraw()
-        self.page5.redraw()
+        for page in [self.page4, self.page5, self.page6, self.page7]:
+            if page.content is not None:
+                page.content.request_redraw()
+
+    def append_rows(self, df):
+        """
+        Appends rows to the shown (streaming) data source.
+        """
+        self.page1.df_list_ctrl.append_rows(df)
+        self.selection_change_callback()
+
+
+class LiveHandle(object):
+    """
+    Handle of a window opened by `show_live`. Appended data frames are
+    buffered and applied to the window in batches, at most once every
+    REFRESH_INTERVAL_MS, so that high append rates do not block the UI.
+    """
+
+    REFRESH_INTERVAL_MS = 200
 
+    def __init__(self, source):
+        self.source = source
+        self.frame = None
+        self.pending = []
+        self.is_flush_scheduled = False
+        self.lock = threading.Lock()
 
-def show(df):
+    def open(self):
+        self.frame = MainFrame(self.source)
+        self.frame.Show()
+
+    def append(self, df_chunk):
+        """
+        Appends the rows of a data frame (with the same columns) to the
+        window. May be called from any thread.
+        """
+        with self.lock:
+            self.pending.append(df_chunk)
+            schedule_flush = not self.is_flush_scheduled
+            self.is_flush_scheduled = True
+        if schedule_flush:
+            wx.CallAfter(wx.CallLater, self.REFRESH_INTERVAL_MS, self._flush)
+
+    def _flush(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+            self.is_flush_scheduled = False
+        if not self.frame:
+            # the window has been closed
+            return
+        self.frame.append_rows(pending[0] if len(pending) == 1 else pd.concat(pending, ignore_index=True))
+
+
+def show(df, dictionary_encode=False, filter_threads=None, column_indexes=False):
     """
     The main function to start the data frame GUI.
+
+    Apart from a data frame, `df` can be a lazy data source for tables
+    which do not fit into memory: a `dfgui.data_source.DataSource`, a
+    structured NumPy array, or the path of a Parquet, Arrow/Feather,
+    `.npy` (memory-mapped) or CSV file.
+
+    With `dictionary_encode`, string columns of a data frame with few
+    distinct values are converted into categoricals on load, which makes
+    filtering, sorting and plotting them faster and saves memory when
+    the original data frame is not kept.
+
+    `filter_threads` sets the number of threads scanning the rows for
+    filter conditions, `column_indexes` answers conditions from indexes
+    of the filtered columns instead (see `DataFrameViewModel`).
     """
 
     app = wx.App(False)
-    frame = MainFrame(df)
+    frame = MainFrame(as_data_source(df, dictionary_encode), filter_threads, column_indexes)
     frame.Show()
     app.MainLoop()
+
+
+def show_live(df):
+    """
+    Non-blocking variant of `show` for a data frame which grows while it
+    is shown. Returns a `LiveHandle`; calling `handle.append(df_chunk)`
+    adds rows to the open window.
+
+    If a wx application is already running (e.g. after `%gui wx` in
+    IPython), the window is opened in it. Otherwise the event loop runs
+    on a background thread (which is not supported on macOS).
+    """
+    handle = LiveHandle(StreamingSource(df))
+    if wx.GetApp() is not None:
+        handle.open()
+        return handle
+
+    is_open = threading.Event()
+
+    def run():
+        app = wx.App(False)
+        handle.open()
+        is_open.set()
+        app.MainLoop()
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    is_open.wait()
+    return handle
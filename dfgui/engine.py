@@ -0,0 +1,604 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+The headless engine behind the GUI. `DataFrameViewModel` implements
+filtering, projection, sorting, page fetching, selection and the data
+preparation of the plots on top of a data source, using only NumPy and
+pandas. The wx widgets are thin adapters over it, and it can be driven
+from scripts and benchmarks without a display.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dfgui import plot_data
+from dfgui.column_index import build_column_index
+from dfgui.data_source import as_data_source
+from dfgui.filtering import compile_condition
+from dfgui.formatting import CellFormatter
+from dfgui.profiling import profiler
+from dfgui.sorting import ColumnSortOrder
+from dfgui.view_model import DataFrameView, GrowableArray
+
+
+def display_columns(columns):
+    """
+    Returns the column names as shown in the GUI (integer column labels,
+    e.g. of a RangeIndex, are converted to strings).
+    """
+    if isinstance(columns, pd.RangeIndex) or columns.dtype.kind in "iu":
+        return pd.Index([str(column) for column in columns])
+    return columns[:]
+
+
+class DataFrameViewModel(object):
+    """
+    The state of a data frame view: the rows passing the filter, in the
+    order of the sort keys, the projected columns and the selection.
+
+    Columns are addressed by their display names (see `display_columns`)
+    in the public API and by their positions in the source internally.
+    Filter conditions are given as (column name, condition) tuples.
+    With `dictionary_encode`, low cardinality string columns of a data
+    frame are converted into categoricals (see `as_data_source`).
+
+    With `column_indexes` (by default USE_COLUMN_INDEXES), filter
+    conditions are answered from indexes of the filtered columns. Building
+    an index sorts the column, which costs about as much as ten scans, so
+    it only pays off for columns which are filtered repeatedly.
+
+    Filter conditions which are not answered by a column index are
+    evaluated on `filter_threads` threads (by default FILTER_THREADS),
+    each scanning chunks or ranges of rows.
+    """
+
+    # answer filter conditions from column indexes built on first use
+    USE_COLUMN_INDEXES = False
+    HISTOGRAM_BINS = 100
+    FILTER_THREADS = 1
+    # chunks are split into row ranges of at least this size to be
+    # evaluated on different threads
+    MIN_ROWS_PER_THREAD = 50000
+
+    def __init__(self, source, dictionary_encode=False, filter_threads=None, column_indexes=None):
+        self.source = as_data_source(source, dictionary_encode)
+        if column_indexes is not None:
+            self.USE_COLUMN_INDEXES = column_indexes
+        self.filter_threads = filter_threads
+        self.thread_pool = None
+        self.columns = display_columns(self.source.columns)
+
+        # list of (column position, ascending) sort keys, primary key first
+        self.sort_by_columns = []
+        # sort orders (permutations and ranks) of the source per column
+        # position
+        self.sort_orders = {}
+        # permutation of the source for the current multi-key sort
+        self.multi_key_permutations = {}
+
+        # cache of the boolean masks of individual filter conditions
+        self.condition_masks = {}
+        self.condition_lock = threading.Lock()
+        # indexes of the filtered columns per column position
+        self.column_indexes = {}
+        self.conditions = []
+        self._set_mask_array(np.ones(self.source.num_rows, dtype=bool))
+
+        # histogram binnings per column position
+        self.binnings = {}
+
+        # the rows/columns of the source to display, without copying any data
+        self.view = DataFrameView(self.source)
+        self.cell_formatter = CellFormatter(self.view)
+
+    def __len__(self):
+        return len(self.view)
+
+    def clear_caches(self):
+        """
+        Drops all cached condition masks, indexes, sort permutations and
+        histogram binnings (e.g. for benchmarking).
+        """
+        with self.condition_lock:
+            self.condition_masks.clear()
+        self.column_indexes.clear()
+        self.sort_orders.clear()
+        self.multi_key_permutations.clear()
+        self.binnings.clear()
+
+    def _set_mask_array(self, mask):
+        # the mask is kept in a growable buffer, so that appending rows
+        # does not copy it
+        self.mask_buffer = GrowableArray(mask)
+        self.mask = self.mask_buffer.values
+
+    # projection
+
+    def set_columns(self, columns):
+        """
+        Sets the displayed columns (names, in display order).
+        """
+        self.view.set_columns(np.array([self.columns.get_loc(column) for column in columns], dtype=int))
+        self.cell_formatter.invalidate()
+
+    # page fetch
+
+    def get_text(self, row, col):
+        """
+        Returns the formatted cell at the given view row and column.
+        """
+        return self.cell_formatter.get_text(row, col)
+
+    def get_page(self, start, stop):
+        """
+        Returns the formatted cells of the view rows [start, stop) as list
+        of rows.
+        """
+        return [
+            [self.cell_formatter.get_text(row, col) for col in range(len(self.view.columns))]
+            for row in range(start, min(stop, len(self.view)))
+        ]
+
+    def get_value(self, row, col):
+        return self.view.get_value(row, col)
+
+    # sorting
+
+    def sort(self, sort_by_columns):
+        """
+        Sorts by a list of (column name, ascending) keys, primary key first.
+        """
+        self._set_sort_keys([
+            (self.columns.get_loc(column), ascending) for column, ascending in sort_by_columns
+        ])
+
+    def _set_sort_keys(self, sort_by_columns):
+        self.sort_by_columns = sort_by_columns
+        with profiler.measure("sort"):
+            self.view.set_rows(self._compute_rows())
+        self.cell_formatter.invalidate()
+
+    def toggle_sort(self, col, add_key=False):
+        """
+        Sorts by the displayed column `col` like clicking its header:
+        clicking a sort column again toggles its direction, `add_key`
+        (shift click) adds a further sort key or toggles an existing one.
+        """
+        column = self.view.columns[col]
+        sort_directions = dict(self.sort_by_columns)
+        ascending = not sort_directions.get(column, False)
+
+        if add_key:
+            if column in sort_directions:
+                sort_by_columns = [
+                    (c, ascending if c == column else a) for c, a in self.sort_by_columns
+                ]
+            else:
+                sort_by_columns = self.sort_by_columns + [(column, ascending)]
+        else:
+            if self.sort_by_columns[:1] != [(column, not ascending)]:
+                ascending = True
+            sort_by_columns = [(column, ascending)]
+
+        self._set_sort_keys(sort_by_columns)
+
+    def update_rows(self):
+        """
+        Recomputes the displayed rows from the mask and the sort keys.
+        """
+        with profiler.measure("update_rows"):
+            self.view.set_rows(self._compute_rows())
+        self.cell_formatter.invalidate()
+
+    def _get_sort_order(self, column):
+        """
+        Returns the `ColumnSortOrder` of the column at the given position,
+        which is computed once per column.
+        """
+        if column not in self.sort_orders:
+            self.sort_orders[column] = ColumnSortOrder(self.source.get_column(column))
+        return self.sort_orders[column]
+
+    def _compute_rows(self):
+        """
+        Determines the positions of the rows of the source which pass the
+        filter, in the order defined by self.sort_by_columns.
+        """
+        mask = self.mask
+
+        if len(self.sort_by_columns) == 1:
+            column, ascending = self.sort_by_columns[0]
+            permutation = self._get_sort_order(column).get_permutation(ascending)
+            return permutation[mask[permutation]]
+
+        if len(self.sort_by_columns) > 1:
+            permutation = self._get_multi_key_permutation()
+            return permutation[mask[permutation]]
+        return np.flatnonzero(mask)
+
+    def _get_multi_key_permutation(self):
+        """
+        Returns the row positions of the source in the order of multiple
+        sort keys. Only the permutation of the current sort keys is kept.
+        """
+        sort_by_columns = tuple(self.sort_by_columns)
+        if sort_by_columns not in self.multi_key_permutations:
+            rows = np.arange(self.source.num_rows)
+            keys, sizes = self._get_rank_keys(rows)
+            combined = _combine_rank_keys(keys, sizes)
+            if combined is not None:
+                permutation = np.argsort(combined, kind='mergesort')
+            else:
+                # lexsort is stable and uses the last key as primary key
+                permutation = np.lexsort(keys[::-1])
+            self.multi_key_permutations.clear()
+            self.multi_key_permutations[sort_by_columns] = permutation
+        return self.multi_key_permutations[sort_by_columns]
+
+    def _get_rank_keys(self, rows):
+        """
+        Returns the ranks of the given rows per sort key (primary key
+        first), inverted for descending keys, and the number of ranks per
+        key. Missing values have the highest rank in either direction.
+        """
+        keys = []
+        sizes = []
+        for column, ascending in self.sort_by_columns:
+            ranks, null_rank = self._get_sort_order(column).get_ranks()
+            ranks = ranks[rows]
+            if not ascending:
+                ranks = np.where(ranks == null_rank, null_rank, null_rank - 1 - ranks)
+            keys.append(ranks)
+            sizes.append(null_rank + 1)
+        return keys, sizes
+
+    # filtering
+
+    def apply_filter(self, conditions):
+        """
+        Filters by the conjunction of the conditions. Returns whether the
+        rows have changed and the list of (condition, exception) tuples
+        of failed conditions.
+        """
+        mask, errors = self.compute_mask(conditions)
+        return self.set_mask(conditions, mask), errors
+
+    def compute_mask(self, conditions, is_cancelled=None):
+        """
+        Evaluates the conjunction of the given conditions and returns
+        the resulting mask (as numpy array) together with a list of
+        (condition, exception) tuples of failed conditions. This does not
+        modify the displayed rows and can therefore run on a worker
+        thread. If the optional `is_cancelled` callable returns True
+        between the evaluation of two conditions, None is returned.
+        """
+        num_rows = self.source.num_rows
+        mask = np.ones(num_rows, dtype=bool)
+        errors = []
+        with profiler.measure("filter"):
+            for column, condition in conditions:
+                if condition.strip() == '':
+                    continue
+                if is_cancelled is not None and is_cancelled():
+                    return None
+                result = self._get_condition_mask(column, condition, num_rows)
+                if isinstance(result, Exception):
+                    errors.append((condition, result))
+                elif result is not None:
+                    mask &= result
+        return mask, errors
+
+    def set_mask(self, conditions, mask):
+        """
+        Applies a mask computed by `compute_mask` for the given conditions
+        and returns whether the displayed rows have changed.
+        """
+        old_mask = self.mask
+        if len(mask) < self.source.num_rows:
+            # rows have been appended while the mask was computed
+            mask = np.concatenate([mask, self._evaluate_conditions(conditions, len(mask))])
+        self._set_mask_array(mask)
+        self.conditions = conditions
+
+        # only keep the masks of the current conditions, so that the
+        # cache does not grow with every intermediate keystroke
+        current_keys = set(conditions)
+        with self.condition_lock:
+            for key in list(self.condition_masks):
+                if key not in current_keys:
+                    del self.condition_masks[key]
+
+        has_changed = bool((old_mask != self.mask).any())
+        if has_changed:
+            self.update_rows()
+        return has_changed
+
+    def _evaluate_conditions(self, conditions, start):
+        """
+        Returns the conjunction of the conditions for the rows from
+        `start` on. Conditions which cannot be evaluated are ignored.
+        """
+        num_rows = self.source.num_rows
+        mask = np.ones(num_rows - start, dtype=bool)
+        for column, condition in conditions:
+            if condition.strip() == '':
+                continue
+            result = self._get_condition_mask(column, condition, num_rows)
+            if isinstance(result, np.ndarray):
+                mask &= result[start:]
+        return mask
+
+    def _get_condition_mask(self, column, condition, num_rows):
+        """
+        Returns the boolean mask of a single condition for the first
+        `num_rows` rows as numpy array, None if the condition does not
+        evaluate to a boolean series, or the exception raised during
+        evaluation. Results are cached per (column, condition), so that
+        only modified conditions have to be evaluated again, and for
+        appended rows only these rows are evaluated.
+        """
+        key = (column, condition)
+        with self.condition_lock:
+            is_cached = key in self.condition_masks
+            result = self.condition_masks.get(key)
+        if not is_cached:
+            result = self._evaluate_condition(column, condition, 0)
+            with self.condition_lock:
+                self.condition_masks[key] = result
+        with self.condition_lock:
+            if isinstance(result, GrowableArray) and result.size < num_rows:
+                extension = self._evaluate_condition(column, condition, result.size)
+                if isinstance(extension, GrowableArray):
+                    result.extend(extension.values)
+                else:
+                    result = self.condition_masks[key] = extension
+        if isinstance(result, GrowableArray):
+            return result.values[:num_rows]
+        return result
+
+    def _evaluate_condition(self, column, condition, start):
+        """
+        Evaluates a condition for the rows from `start` on, returning the
+        mask as GrowableArray, None or the exception.
+        """
+        try:
+            expression = compile_condition(condition)
+            position = self.columns.get_loc(column)
+            parts = []
+            if start == 0 and self.USE_COLUMN_INDEXES:
+                index = self._get_column_index(position)
+                part = index.evaluate(expression) if index is not None else None
+                if part is not None:
+                    parts.append(part)
+                    # rows appended after building the index are scanned
+                    start = len(part)
+            scanned = self._scan(expression, position, start)
+            if scanned is None:
+                return None
+            parts += scanned
+            if len(parts) == 1:
+                return GrowableArray(parts[0])
+            return GrowableArray(np.concatenate(parts) if len(parts) > 0 else np.array([], dtype=bool))
+        except Exception as e:
+            return e
+
+    def _scan(self, expression, column, start):
+        """
+        Evaluates an expression on the rows from `start` on of the column
+        at the given position. Returns the list of partial masks, or None
+        if the expression does not evaluate to a boolean mask.
+
+        The column is read chunk by chunk, so that lazy sources never have
+        to load more than a few chunks of a single column. With multiple
+        threads, large chunks are split into row ranges, and batches of
+        (at least) one range per thread are evaluated in parallel, which
+        works because NumPy releases the GIL in its vectorized loops.
+        """
+        num_threads = self.get_filter_threads()
+
+        def evaluate(batch):
+            if len(batch) > 1:
+                return self._get_thread_pool(num_threads).map(
+                    lambda rows: _evaluate_rows(expression, rows), batch
+                )
+            return [_evaluate_rows(expression, rows) for rows in batch]
+
+        parts = []
+        batch = []
+        for chunk in self.source.iter_column_chunks(column, start):
+            batch += _split_rows(chunk, num_threads, self.MIN_ROWS_PER_THREAD)
+            if len(batch) >= num_threads:
+                parts += evaluate(batch)
+                batch = []
+        parts += evaluate(batch)
+        if any(part is None for part in parts):
+            return None
+        return parts
+
+    def get_filter_threads(self):
+        return self.filter_threads if self.filter_threads is not None else self.FILTER_THREADS
+
+    def _get_thread_pool(self, num_threads):
+        """
+        Returns a pool of `num_threads` threads, which is created on first
+        use and replaced if the number of threads has changed.
+        """
+        if self.thread_pool is not None and self.thread_pool_size != num_threads:
+            self.thread_pool.close()
+            self.thread_pool = None
+        if self.thread_pool is None:
+            from multiprocessing.pool import ThreadPool
+            self.thread_pool = ThreadPool(num_threads)
+            self.thread_pool_size = num_threads
+        return self.thread_pool
+
+    def _get_column_index(self, column):
+        """
+        Returns the index of the column at the given position (or None
+        if the column cannot be indexed), building it on first use.
+        """
+        if column not in self.column_indexes:
+            self.column_indexes[column] = build_column_index(self.source.get_column(column))
+        return self.column_indexes[column]
+
+    def get_filtered_df(self):
+        """
+        Materializes all rows passing the filter (in source order).
+        """
+        return self.source.to_frame(np.flatnonzero(self.mask), np.arange(len(self.columns)))
+
+    def get_filtered_column(self, column):
+        """
+        Returns the values of the column at the given position for all
+        rows passing the filter. Lazy sources are read chunk by chunk.
+        """
+        return self.source.get_filtered_column(column, self.mask)
+
+    # selection
+
+    def set_selected_items(self, items):
+        """
+        Sets the selection from an array of view positions.
+        """
+        self.view.set_selected_items(items)
+
+    def get_selected_items(self):
+        return self.view.get_selected_items()
+
+    def get_selected_rows(self):
+        return self.view.get_selected_rows()
+
+    def get_export_rows(self):
+        """
+        Returns the source rows to copy or export: the selected rows in
+        display order, or all displayed rows if nothing is selected.
+        """
+        rows = self.view.get_selected_rows()
+        return rows if len(rows) > 0 else self.view.rows
+
+    # plots
+
+    def get_histogram(self, column):
+        """
+        Returns the binning of the column at the given position and the
+        counts per bin of the rows passing the filter. The binning is
+        computed once per column.
+        """
+        if column not in self.binnings:
+            self.binnings[column] = plot_data.HistogramBinning(
+                self.source.get_column(column), self.HISTOGRAM_BINS
+            )
+        binning = self.binnings[column]
+        return binning, binning.counts(self.mask)
+
+    def get_scatter(self, column1, column2, mode="Auto", max_points=100000, density_bins=256):
+        """
+        Prepares the scatter plot of two columns (positions) for the rows
+        passing the filter, see `plot_data.prepare_scatter`.
+        """
+        return plot_data.prepare_scatter(
+            self.get_filtered_column(column1).values,
+            self.get_filtered_column(column2).values,
+            mode, max_points, density_bins,
+        )
+
+    # streaming
+
+    def append_rows(self, df):
+        """
+        Appends the rows of a data frame to the source, which has to be a
+        StreamingSource. Only the new rows are evaluated against the
+        current filter conditions, the cached sort orders of the sort
+        columns are extended by merging in the new rows instead of sorting
+        again, and histogram binnings are extended by the new rows.
+        """
+        start = self.source.num_rows
+        self.source.append(df)
+        if self.source.num_rows == start:
+            return
+        self.mask = self.mask_buffer.extend(self._evaluate_conditions(self.conditions, start))
+
+        sort_columns = set(column for column, ascending in self.sort_by_columns)
+        for column, sort_order in list(self.sort_orders.items()):
+            if column not in sort_columns or not sort_order.extend(self._get_new_values(column, start), start):
+                # recomputed on demand
+                del self.sort_orders[column]
+        for sort_by_columns in list(self.multi_key_permutations):
+            if sort_by_columns != tuple(self.sort_by_columns) or not self._extend_multi_key_permutation(start):
+                del self.multi_key_permutations[sort_by_columns]
+
+        for column, binning in list(self.binnings.items()):
+            if not binning.extend(self._get_new_values(column, start)):
+                # recomputed on demand
+                del self.binnings[column]
+
+        self.view.add_source_rows()
+        self.update_rows()
+
+    def _extend_multi_key_permutation(self, start):
+        """
+        Merges the rows from `start` on into the permutation of the
+        current multi-key sort. The ranks only change in an order
+        preserving way, so the existing rows stay in order. Returns False
+        if the keys cannot be combined into a single key.
+        """
+        sort_by_columns = tuple(self.sort_by_columns)
+        permutation = self.multi_key_permutations[sort_by_columns]
+        sorted_keys = _combine_rank_keys(*self._get_rank_keys(permutation))
+        new_keys = _combine_rank_keys(*self._get_rank_keys(np.arange(start, self.source.num_rows)))
+        if sorted_keys is None or new_keys is None:
+            return False
+        order = np.argsort(new_keys, kind='mergesort')
+        # inserting after equal keys keeps the sort stable
+        positions = np.searchsorted(sorted_keys, new_keys[order], side="right")
+        self.multi_key_permutations[sort_by_columns] = np.insert(permutation, positions, start + order)
+        return True
+
+    def _get_new_values(self, column, start):
+        """
+        Returns the values of the column from row `start` on, reading
+        only the chunks which contain them.
+        """
+        return pd.concat(list(self.source.iter_column_chunks(column, start)), ignore_index=True)
+
+
+def _combine_rank_keys(keys, sizes):
+    """
+    Combines the ranks of multiple sort keys (primary key first) into a
+    single int64 key with the same lexicographic order. Returns None if
+    the combined key could overflow.
+    """
+    if np.prod(np.array(sizes, dtype=float)) >= 2.0 ** 63:
+        return None
+    combined = np.zeros(len(keys[0]), dtype=np.int64)
+    for key, size in zip(keys, sizes):
+        combined = combined * size + key
+    return combined
+
+
+def _split_rows(chunk, num_pieces, min_rows):
+    """
+    Splits a series into up to `num_pieces` row ranges of at least
+    `min_rows` rows (without copying).
+    """
+    num_pieces = max(1, min(num_pieces, len(chunk) // min_rows))
+    if num_pieces == 1:
+        return [chunk]
+    bounds = np.linspace(0, len(chunk), num_pieces + 1).astype(int)
+    return [chunk.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def _evaluate_rows(expression, rows):
+    """
+    Evaluates a FilterExpression on a series, returning the mask as
+    numpy array or None if it does not evaluate to a boolean mask.
+    """
+    mask = np.asarray(expression.evaluate(rows))
+    if mask.dtype != bool or mask.shape != (len(rows),):
+        return None
+    return mask
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+Serialization of a selection of rows and columns of a data source, for
+copying to the clipboard and exporting to TSV, CSV or Parquet files.
+"""
+
+import io
+
+import numpy as np
+
+
+EXPORT_FORMATS = ["tsv", "csv", "parquet"]
+SEPARATORS = {"tsv": "\t", "csv": ","}
+
+
+def format_of_path(path):
+    """
+    Returns the export format matching the extension of the path.
+    """
+    extension = str(path).lower().rsplit(".", 1)[-1]
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    elif extension == "csv":
+        return "csv"
+    return "tsv"
+
+
+def selection_to_text(source, rows, columns, sep="\t"):
+    """
+    Serializes the given rows and column positions of the source as
+    delimited text with a header line, in a single `to_csv` call.
+    """
+    return source.to_frame(rows, columns).to_csv(sep=sep, index=False)
+
+
+def export_selection(source, rows, columns, path, file_format=None, chunk_size=100000,
+                     progress_callback=None, is_cancelled=None):
+    """
+    Writes the given rows (in output order) and column positions of the
+    source to a file. Rows are materialized and written `chunk_size` at a
+    time, so only one chunk has to fit into memory. The progress callback
+    receives the fraction of rows written. Returns False if the export was
+    cancelled (leaving a partial file).
+    """
+    if file_format is None:
+        file_format = format_of_path(path)
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError("Unsupported export format: {!r}".format(file_format))
+
+    rows = np.asarray(rows, dtype=int)
+    starts = range(0, max(len(rows), 1), chunk_size)
+
+    def chunks():
+        for start in starts:
+            if is_cancelled is not None and is_cancelled():
+                return
+            yield source.to_frame(rows[start:start + chunk_size], columns)
+            if progress_callback is not None:
+                progress_callback(min(start + chunk_size, len(rows)) / max(len(rows), 1))
+
+    num_written = 0
+    if file_format == "parquet":
+        import pyarrow
+        import pyarrow.parquet
+        writer = None
+        try:
+            for df in chunks():
+                # later chunks are cast to the schema of the first chunk
+                table = pyarrow.Table.from_pandas(
+                    df, schema=None if writer is None else writer.schema, preserve_index=False
+                )
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                num_written += 1
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with io.open(path, "w", encoding="utf-8", newline="") as f:
+            for df in chunks():
+                f.write(df.to_csv(sep=SEPARATORS[file_format], index=False, header=num_written == 0))
+                num_written += 1
+
+    return num_written == len(starts)
@@ -0,0 +1,514 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+A small and safe expression language for filter conditions.
+
+Conditions use a subset of Python/pandas syntax, where the underscore `_`
+refers to the filtered column, e.g.:
+
+    _ == 'A'
+    (_ >= date(2016, 1, 1)) & (_ < date(2016, 3, 1))
+    0 < _ <= 10
+    _.isin([1, 2, 3])
+    _.between(-1, 1)
+    _.str.contains('foo') | _.isnull()
+
+Conditions are parsed with Python's `ast` module (nothing is passed to
+`eval`) and compiled into a tree of expression nodes, which evaluate in a
+vectorized way on the column. Purely numerical conditions are evaluated
+with numexpr if it is available.
+"""
+
+import ast
+import datetime
+import operator
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+
+class FilterSyntaxError(ValueError):
+    """
+    Raised for conditions which are not part of the filter language.
+    """
+    pass
+
+
+class Expression(object):
+    """
+    Base class of the compiled expression nodes.
+    """
+
+    def evaluate(self, column):
+        raise NotImplementedError
+
+    def to_numexpr(self):
+        """
+        Returns an equivalent numexpr source string (with the column named
+        `x`) or None if the expression is not supported by numexpr.
+        """
+        return None
+
+
+class Column(Expression):
+
+    def evaluate(self, column):
+        return column
+
+    def to_numexpr(self):
+        return "x"
+
+
+class Constant(Expression):
+
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self, column):
+        return self.value
+
+    def to_numexpr(self):
+        if isinstance(self.value, (bool, np.bool_)):
+            return str(bool(self.value))
+        elif isinstance(self.value, (int, float, np.integer, np.floating)):
+            return repr(self.value)
+        return None
+
+
+def _operand_for(column, value):
+    # comparing datetime64 columns with date objects requires timestamps
+    if isinstance(column, pd.Series) and column.dtype.kind == "M" and \
+            isinstance(value, datetime.date):
+        return pd.Timestamp(value)
+    return value
+
+
+class Compare(Expression):
+
+    OPERATORS = {
+        ast.Eq: ("==", operator.eq),
+        ast.NotEq: ("!=", operator.ne),
+        ast.Lt: ("<", operator.lt),
+        ast.LtE: ("<=", operator.le),
+        ast.Gt: (">", operator.gt),
+        ast.GtE: (">=", operator.ge),
+    }
+
+    def __init__(self, op, left, right):
+        self.symbol, self.func = self.OPERATORS[op]
+        self.left = left
+        self.right = right
+
+    def evaluate(self, column):
+        left = self.left.evaluate(column)
+        right = self.right.evaluate(column)
+        left, right = _operand_for(right, left), _operand_for(left, right)
+        return self.func(left, right)
+
+    def to_numexpr(self):
+        return _binary_numexpr(self.symbol, self.left, self.right)
+
+
+class Arithmetic(Expression):
+
+    OPERATORS = {
+        ast.Add: ("+", operator.add),
+        ast.Sub: ("-", operator.sub),
+        ast.Mult: ("*", operator.mul),
+        ast.Div: ("/", operator.truediv),
+        ast.FloorDiv: (None, operator.floordiv),
+        ast.Mod: ("%", operator.mod),
+        ast.Pow: ("**", operator.pow),
+    }
+
+    def __init__(self, op, left, right):
+        self.symbol, self.func = self.OPERATORS[op]
+        self.left = left
+        self.right = right
+
+    def evaluate(self, column):
+        return self.func(self.left.evaluate(column), self.right.evaluate(column))
+
+    def to_numexpr(self):
+        if self.symbol is None:
+            return None
+        return _binary_numexpr(self.symbol, self.left, self.right)
+
+
+class Logical(Expression):
+    """
+    Element-wise conjunction/disjunction (`&`, `|`, `and`, `or`).
+    """
+
+    def __init__(self, symbol, operands):
+        self.symbol = symbol
+        self.func = operator.and_ if symbol == "&" else operator.or_
+        self.operands = operands
+
+    def evaluate(self, column):
+        result = self.operands[0].evaluate(column)
+        for operand in self.operands[1:]:
+            result = self.func(result, operand.evaluate(column))
+        return result
+
+    def to_numexpr(self):
+        sources = [operand.to_numexpr() for operand in self.operands]
+        if any(source is None for source in sources):
+            return None
+        return "(" + " {} ".format(self.symbol).join(sources) + ")"
+
+
+class Unary(Expression):
+
+    OPERATORS = {
+        ast.Invert: ("~", operator.invert),
+        ast.Not: ("~", operator.invert),
+        ast.USub: ("-", operator.neg),
+        ast.UAdd: ("+", operator.pos),
+    }
+
+    def __init__(self, op, operand):
+        self.symbol, self.func = self.OPERATORS[op]
+        self.operand = operand
+
+    def evaluate(self, column):
+        return self.func(self.operand.evaluate(column))
+
+    def to_numexpr(self):
+        source = self.operand.to_numexpr()
+        if source is None:
+            return None
+        return "({}{})".format(self.symbol, source)
+
+
+class Absolute(Expression):
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def evaluate(self, column):
+        return abs(self.operand.evaluate(column))
+
+    def to_numexpr(self):
+        source = self.operand.to_numexpr()
+        if source is None:
+            return None
+        return "abs({})".format(source)
+
+
+class IsIn(Expression):
+
+    def __init__(self, values, negate=False):
+        self.values = values
+        self.negate = negate
+
+    def evaluate(self, column):
+        result = column.isin([_operand_for(column, value) for value in self.values])
+        return ~result if self.negate else result
+
+
+class Between(Expression):
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def evaluate(self, column):
+        return column.between(_operand_for(column, self.low), _operand_for(column, self.high))
+
+
+class IsNull(Expression):
+
+    def __init__(self, negate=False):
+        self.negate = negate
+
+    def evaluate(self, column):
+        return column.notnull() if self.negate else column.isnull()
+
+
+class StringMatch(Expression):
+
+    METHODS = ("contains", "startswith", "endswith")
+
+    def __init__(self, method, pattern, kwargs):
+        self.method = method
+        self.pattern = pattern
+        self.kwargs = kwargs
+
+    def evaluate(self, column):
+        kwargs = dict(self.kwargs)
+        if self.method == "contains":
+            kwargs.setdefault("regex", False)
+        # missing values never match
+        kwargs["na"] = False
+        if column.dtype.kind != "O":
+            column = column.astype(str)
+        return getattr(column.str, self.method)(self.pattern, **kwargs)
+
+
+def _binary_numexpr(symbol, left, right):
+    left_source = left.to_numexpr()
+    right_source = right.to_numexpr()
+    if left_source is None or right_source is None:
+        return None
+    return "({} {} {})".format(left_source, symbol, right_source)
+
+
+class FilterExpression(object):
+    """
+    A compiled filter condition.
+    """
+
+    # below this size the numexpr call overhead is not worth it
+    NUMEXPR_MIN_ROWS = 100000
+
+    def __init__(self, source, root):
+        self.source = source
+        self.root = root
+        self.numexpr_source = root.to_numexpr() if numexpr is not None else None
+
+    def evaluate(self, column):
+        """
+        Evaluates the condition on a column (a pandas series) and returns
+        the result, which is a boolean series/array for valid filters.
+        """
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return self._evaluate_categorical(column)
+        if self.numexpr_source is not None and column.dtype.kind in "fiub" and \
+                len(column) >= self.NUMEXPR_MIN_ROWS:
+            try:
+                return numexpr.evaluate(self.numexpr_source, local_dict={"x": column.values}, truediv=True)
+            except Exception:
+                # e.g. operations numexpr does not support for this dtype
+                pass
+        return self.root.evaluate(column)
+
+    def _evaluate_categorical(self, column):
+        """
+        Evaluates the condition once per category of a categorical column
+        and maps the results to the rows via the integer codes.
+        """
+        categories = column.cat.categories
+        # append a missing value, which is selected by the code -1 of
+        # missing values
+        representatives = pd.Series(categories).reindex(np.arange(len(categories) + 1))
+        matches = np.asarray(self.root.evaluate(representatives))
+        if matches.dtype != bool or matches.shape != (len(representatives),):
+            # not a filter condition, evaluate on the values instead
+            return self.root.evaluate(column.astype(categories.dtype))
+        return matches[column.cat.codes.values]
+
+
+class _Compiler(object):
+    """
+    Translates a Python AST into expression nodes.
+    """
+
+    DATE_CONSTRUCTORS = {
+        "date": datetime.date,
+        "datetime": datetime.datetime,
+        "datetime.date": datetime.date,
+        "datetime.datetime": datetime.datetime,
+        "Timestamp": pd.Timestamp,
+        "pd.Timestamp": pd.Timestamp,
+    }
+
+    CONSTANT_NAMES = {
+        "True": True,
+        "False": False,
+        "None": None,
+        "nan": np.nan,
+        "np.nan": np.nan,
+        "inf": np.inf,
+        "np.inf": np.inf,
+    }
+
+    NULL_METHODS = {
+        "isnull": False,
+        "isna": False,
+        "notnull": True,
+        "notna": True,
+    }
+
+    def compile(self, node):
+        method = getattr(self, "compile_" + type(node).__name__, None)
+        if method is None:
+            raise FilterSyntaxError("Unsupported syntax: {}".format(type(node).__name__))
+        return method(node)
+
+    def constant(self, node):
+        """
+        Evaluates a node that must be a literal (numbers, strings, dates,
+        lists of literals).
+        """
+        expression = self.compile(node)
+        if not isinstance(expression, Constant):
+            raise FilterSyntaxError("Expected a literal value")
+        return expression.value
+
+    def compile_Expression(self, node):
+        return self.compile(node.body)
+
+    def compile_Constant(self, node):
+        return Constant(node.value)
+
+    # Python 2 and Python < 3.8 literals
+    def compile_Num(self, node):
+        return Constant(node.n)
+
+    def compile_Str(self, node):
+        return Constant(node.s)
+
+    def compile_NameConstant(self, node):
+        return Constant(node.value)
+
+    def compile_List(self, node):
+        return Constant([self.constant(element) for element in node.elts])
+
+    compile_Tuple = compile_List
+    compile_Set = compile_List
+
+    def compile_Name(self, node):
+        if node.id == "_":
+            return Column()
+        elif node.id in self.CONSTANT_NAMES:
+            return Constant(self.CONSTANT_NAMES[node.id])
+        raise FilterSyntaxError("Unknown name '{}'".format(node.id))
+
+    def compile_Attribute(self, node):
+        name = _dotted_name(node)
+        if name in self.CONSTANT_NAMES:
+            return Constant(self.CONSTANT_NAMES[name])
+        raise FilterSyntaxError("Unsupported attribute '{}'".format(name or node.attr))
+
+    def compile_UnaryOp(self, node):
+        if type(node.op) not in Unary.OPERATORS:
+            raise FilterSyntaxError("Unsupported operator")
+        operand = self.compile(node.operand)
+        if isinstance(operand, Constant) and isinstance(node.op, ast.USub):
+            return Constant(-operand.value)
+        return Unary(type(node.op), operand)
+
+    def compile_BinOp(self, node):
+        if isinstance(node.op, ast.BitAnd):
+            return Logical("&", [self.compile(node.left), self.compile(node.right)])
+        elif isinstance(node.op, ast.BitOr):
+            return Logical("|", [self.compile(node.left), self.compile(node.right)])
+        elif type(node.op) in Arithmetic.OPERATORS:
+            return Arithmetic(type(node.op), self.compile(node.left), self.compile(node.right))
+        raise FilterSyntaxError("Unsupported operator")
+
+    def compile_BoolOp(self, node):
+        symbol = "&" if isinstance(node.op, ast.And) else "|"
+        return Logical(symbol, [self.compile(value) for value in node.values])
+
+    def compile_Compare(self, node):
+        parts = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            parts.append(self.compile_comparison(op, left, right))
+            left = right
+        if len(parts) == 1:
+            return parts[0]
+        # chained comparisons like `0 < _ < 1`
+        return Logical("&", parts)
+
+    def compile_comparison(self, op, left, right):
+        if isinstance(op, (ast.In, ast.NotIn)):
+            self.require_column(left)
+            return IsIn(self.constant(right), negate=isinstance(op, ast.NotIn))
+        elif isinstance(op, (ast.Is, ast.IsNot)):
+            self.require_column(left)
+            if self.constant(right) is not None:
+                raise FilterSyntaxError("'is' is only supported for None")
+            return IsNull(negate=isinstance(op, ast.IsNot))
+        elif type(op) in Compare.OPERATORS:
+            return Compare(type(op), self.compile(left), self.compile(right))
+        raise FilterSyntaxError("Unsupported comparison")
+
+    def compile_Call(self, node):
+        func = node.func
+        name = _dotted_name(func)
+        if name == "abs" and len(node.args) == 1:
+            return Absolute(self.compile(node.args[0]))
+
+        args = [self.constant(arg) for arg in node.args]
+        kwargs = dict((keyword.arg, self.constant(keyword.value)) for keyword in node.keywords)
+
+        if name in self.DATE_CONSTRUCTORS:
+            try:
+                return Constant(self.DATE_CONSTRUCTORS[name](*args, **kwargs))
+            except (TypeError, ValueError) as e:
+                raise FilterSyntaxError("Invalid date: {}".format(e))
+
+        if not isinstance(func, ast.Attribute):
+            raise FilterSyntaxError("Unsupported function '{}'".format(name))
+
+        method = func.attr
+        target = func.value
+        if isinstance(target, ast.Attribute) and target.attr == "str":
+            self.require_column(target.value)
+            if method not in StringMatch.METHODS or len(args) != 1:
+                raise FilterSyntaxError("Unsupported string method '{}'".format(method))
+            return StringMatch(method, args[0], kwargs)
+
+        self.require_column(target)
+        if method == "isin" and len(args) == 1:
+            return IsIn(args[0])
+        elif method == "between" and len(args) == 2:
+            return Between(args[0], args[1])
+        elif method in self.NULL_METHODS and len(args) == 0:
+            return IsNull(negate=self.NULL_METHODS[method])
+        raise FilterSyntaxError("Unsupported method '{}'".format(method))
+
+    def require_column(self, node):
+        if not (isinstance(node, ast.Name) and node.id == "_"):
+            raise FilterSyntaxError("Methods and membership tests are only supported on '_'")
+
+
+def _dotted_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        prefix = _dotted_name(node.value)
+        if prefix is not None:
+            return prefix + "." + node.attr
+    return None
+
+
+_compiled_cache = OrderedDict()
+_compiled_cache_lock = threading.Lock()
+MAX_CACHED_EXPRESSIONS = 256
+
+
+def compile_condition(condition):
+    """
+    Compiles a filter condition into a `FilterExpression`. Compiled
+    expressions are cached, so compiling an unchanged condition again
+    does not require any parsing.
+    """
+    with _compiled_cache_lock:
+        if condition in _compiled_cache:
+            return _compiled_cache[condition]
+
+    try:
+        tree = ast.parse(condition.strip(), mode="eval")
+    except SyntaxError as e:
+        raise FilterSyntaxError("Invalid syntax: {}".format(e.msg))
+    expression = FilterExpression(condition, _Compiler().compile(tree))
+
+    with _compiled_cache_lock:
+        _compiled_cache[condition] = expression
+        if len(_compiled_cache) > MAX_CACHED_EXPRESSIONS:
+            _compiled_cache.popitem(last=False)
+    return expression
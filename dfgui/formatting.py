@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from dfgui.profiling import profiler
+
+
+def _format_generic(values):
+    return np.array([str(v) for v in values], dtype=object)
+
+
+def _format_native(values):
+    # numpy's string conversion of floats/ints/bools matches str() of the scalars
+    return values.astype(str).astype(object)
+
+
+def _format_datetime(series):
+    """
+    Formats like str(Timestamp): always with the time of day, and with
+    microseconds (or nanoseconds) only for values which have them.
+    """
+    if not isinstance(series.dtype, np.dtype):
+        # timezone aware values
+        return _format_generic(series)
+    values = series.values
+    seconds = values.astype("datetime64[s]")
+    texts = np.char.replace(np.datetime_as_string(seconds), "T", " ").astype(object)
+    nanoseconds = (values - seconds).astype("timedelta64[ns]").view(np.int64)
+    for i in np.flatnonzero(nanoseconds):
+        if nanoseconds[i] % 1000 == 0:
+            texts[i] += ".{:06d}".format(nanoseconds[i] // 1000)
+        else:
+            texts[i] += ".{:09d}".format(nanoseconds[i])
+    texts[series.isnull().values] = "NaT"
+    return texts
+
+
+def _format_categorical(series):
+    # stringify each category only once and expand via the codes
+    categories = np.append(
+        _format_generic(series.cat.categories),
+        np.array(["nan"], dtype=object),
+    )
+    return categories[series.cat.codes.values]
+
+
+def format_series(series):
+    """
+    Vectorized conversion of a series into an object array of strings.
+    """
+    dtype = series.dtype
+    if dtype.name == "category":
+        return _format_categorical(series)
+    elif dtype.kind == "M":
+        return _format_datetime(series)
+    elif dtype.kind in "fiub" and isinstance(series.values, np.ndarray):
+        return _format_native(series.values)
+    else:
+        return _format_generic(series.values)
+
+
+def typical_text_length(source, column, sample_size=100, quantile=0.95):
+    """
+    Estimates the typical length of the formatted values of a column from
+    the first rows and a random sample of rows of the source. Lazy sources
+    are only sampled within their first chunk.
+    """
+    num_rows = min(source.num_rows, source.chunk_offsets[1]) if source.num_chunks > 0 else 0
+    rows = np.arange(min(num_rows, sample_size))
+    if num_rows > sample_size:
+        # sampling with replacement does not permute all rows, and a
+        # private random state leaves the global one alone
+        random = np.random.RandomState(0)
+        rows = np.union1d(rows, random.randint(0, num_rows, sample_size))
+    if len(rows) == 0:
+        return 0
+    lengths = pd.Series(format_series(source.take(rows, [column])[0])).str.len()
+    return int(np.ceil(lengths.quantile(quantile)))
+
+
+class CellFormatter(object):
+    """
+    Provides the cell texts of a `DataFrameView`. Rows are formatted in
+    blocks (all columns at once) using vectorized per-dtype formatters,
+    and a bounded number of formatted blocks is kept in an LRU cache.
+    """
+
+    BLOCK_SIZE = 64
+    MAX_CACHED_BLOCKS = 256
+
+    def __init__(self, view, block_size=BLOCK_SIZE, max_cached_blocks=MAX_CACHED_BLOCKS):
+        self.view = view
+        self.block_size = block_size
+        self.max_cached_blocks = max_cached_blocks
+        self.cache = OrderedDict()
+
+    def invalidate(self):
+        """
+        Drops all cached blocks, required whenever the rows or columns
+        of the view change.
+        """
+        self.cache.clear()
+
+    def get_text(self, row, col):
+        block_index, offset = divmod(row, self.block_size)
+        block = self.cache.get(block_index)
+        if block is None:
+            block = self._format_block(block_index)
+            self.cache[block_index] = block
+            if len(self.cache) > self.max_cached_blocks:
+                self.cache.popitem(last=False)
+        else:
+            # mark as recently used
+            del self.cache[block_index]
+            self.cache[block_index] = block
+        return block[col][offset]
+
+    def _format_block(self, block_index):
+        start = block_index * self.block_size
+        with profiler.measure("format"):
+            return [
+                format_series(series)
+                for series in self.view.get_block(start, start + self.block_size)
+            ]
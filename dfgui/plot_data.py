@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+Data preparation for the plot panels, kept free of any wx/matplotlib
+dependencies.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dfgui.view_model import GrowableArray
+
+
+def is_numeric(values):
+    return values.dtype.kind in "iufb"
+
+
+def finite_pairs(x, y):
+    """
+    Drops all pairs where one of the values is missing/infinite.
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    if valid.all():
+        return x, y
+    return x[valid], y[valid]
+
+
+def _grid_cells(x, y, grid_size):
+    """
+    Assigns each point to a cell of a regular grid_size x grid_size grid
+    spanning the bounding box of the points.
+    """
+    def bin_index(values):
+        low, high = values.min(), values.max()
+        if high == low:
+            return np.zeros(len(values), dtype=np.int64)
+        index = ((values - low) * (grid_size / (high - low))).astype(np.int64)
+        return np.minimum(index, grid_size - 1)
+    return bin_index(x) * grid_size + bin_index(y)
+
+
+def stratified_sample(x, y, max_points, grid_size=64, random_state=None):
+    """
+    Returns the indices of a sample of at most (about) `max_points`
+    points. Points are stratified over a 2D grid: every non-empty cell
+    keeps a share proportional to its size, but at least one point, so
+    that sparse regions and outliers remain visible.
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    random = np.random.RandomState(random_state)
+
+    if not (is_numeric(x) and is_numeric(y)):
+        # drawing with replacement and dropping duplicates does not
+        # permute all points
+        return np.unique(random.randint(0, n, max_points))
+
+    cells = _grid_cells(x.astype(float), y.astype(float), grid_size)
+    # group the points by cell in random order within each cell
+    order = np.lexsort((random.random_sample(n), cells))
+    sorted_cells = cells[order]
+    unique_cells, group_starts, group_counts = np.unique(
+        sorted_cells, return_index=True, return_counts=True
+    )
+    quotas = np.maximum(1, np.floor(group_counts * (max_points / n))).astype(np.int64)
+    rank_in_cell = np.arange(n) - np.repeat(group_starts, group_counts)
+    keep = rank_in_cell < np.repeat(quotas, group_counts)
+    return np.sort(order[keep])
+
+
+def density_raster(x, y, bins=256):
+    """
+    Aggregates the points into a 2D histogram. Returns the counts (with
+    x along the first axis) and the extent [xmin, xmax, ymin, ymax].
+    """
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    return counts, [x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]]
+
+
+SCATTER_MODES = ["Auto", "Density", "Sample", "All points"]
+
+
+class ScatterData(object):
+    """
+    The data of a scatter plot in one of the modes "Density" (`counts`
+    and `extent` of the density raster), "Sample" or "All points" (the
+    points `x`, `y`). `num_points` is the number of points represented.
+    """
+
+    def __init__(self, mode, num_points, x=None, y=None, counts=None, extent=None):
+        self.mode = mode
+        self.num_points = num_points
+        self.x = x
+        self.y = y
+        self.counts = counts
+        self.extent = extent
+
+
+def prepare_scatter(x, y, mode="Auto", max_points=100000, density_bins=256):
+    """
+    Prepares the scatter plot of the values x and y. Above `max_points`
+    points, the "Auto" mode renders a density raster (or a sample of
+    the points for non-numeric values) instead of individual points.
+    """
+    numeric = is_numeric(x) and is_numeric(y)
+    if mode == "Auto":
+        if len(x) <= max_points:
+            mode = "All points"
+        else:
+            mode = "Density" if numeric else "Sample"
+    elif mode == "Density" and not numeric:
+        mode = "Sample"
+
+    if mode == "Density":
+        x, y = finite_pairs(x.astype(float), y.astype(float))
+        counts, extent = density_raster(x, y, density_bins)
+        return ScatterData(mode, len(x), counts=counts, extent=extent)
+    elif mode == "Sample":
+        indices = stratified_sample(x, y, max_points)
+        return ScatterData(mode, len(x), x=x[indices], y=y[indices])
+    return ScatterData(mode, len(x), x=x, y=y)
+
+
+class HistogramBinning(object):
+    """
+    Precomputed histogram binning of a full column. Numeric and datetime
+    columns are split into `bins` equal-width bins, other columns get one
+    bin per distinct value. Every row is assigned its bin once, so that
+    the counts for any filter mask are a single `np.bincount`.
+    """
+
+    def __init__(self, column, bins=100):
+        values = column.values
+        self.dtype = values.dtype
+        self.is_datetime = values.dtype.kind == "M"
+        self.is_discrete = not (is_numeric(values) or self.is_datetime)
+
+        if self.is_discrete:
+            try:
+                if isinstance(column.dtype, pd.CategoricalDtype):
+                    # dictionary encoded already
+                    codes, uniques = column.cat.codes.values, column.cat.categories
+                else:
+                    codes, uniques = pd.factorize(column, sort=True)
+            except TypeError:
+                # values of mixed types cannot be sorted
+                codes, uniques = pd.factorize(column)
+            self.uniques = pd.Index(uniques)
+            self.labels = [str(value) for value in uniques]
+            self.num_bins = len(uniques)
+            # shift by one, so that missing values (-1) get index 0
+            indices = codes + 1
+        else:
+            numbers, valid = self._to_numbers(column)
+            self.num_bins = bins
+            if valid.any():
+                low, high = numbers[valid].min(), numbers[valid].max()
+            else:
+                low, high = 0.0, 1.0
+            if high == low:
+                low, high = low - 0.5, high + 0.5
+            self.edges = np.linspace(low, high, bins + 1)
+            indices = self._to_bin_indices(numbers, valid)
+        self.bin_index_buffer = GrowableArray(_compact(indices, self.num_bins))
+        self.bin_indices = self.bin_index_buffer.values
+
+    def _to_numbers(self, column):
+        values = column.values
+        if self.is_datetime:
+            valid = ~np.isnat(values) if hasattr(np, "isnat") else column.notnull().values
+            numbers = values.view("i8").astype(float)
+        else:
+            numbers = values.astype(float)
+            valid = np.isfinite(numbers)
+        return numbers, valid
+
+    def _to_bin_indices(self, numbers, valid):
+        low, high = self.edges[0], self.edges[-1]
+        indices = np.zeros(len(numbers), dtype=np.int64)
+        scaled = (numbers[valid] - low) * (self.num_bins / (high - low))
+        # like np.histogram, the last bin includes the upper edge
+        indices[valid] = np.minimum(scaled.astype(np.int64), self.num_bins - 1) + 1
+        return indices
+
+    def extend(self, column):
+        """
+        Assigns the bins of values appended to the column. Returns False
+        if the values do not fit into the existing bins (values outside
+        of the range, or new distinct values), in which case the binning
+        has to be computed again.
+        """
+        if self.is_discrete:
+            codes = self.uniques.get_indexer(column.values)
+            if ((codes == -1) & column.notnull().values).any():
+                return False
+            indices = codes + 1
+        else:
+            numbers, valid = self._to_numbers(column)
+            in_range = (numbers[valid] >= self.edges[0]) & (numbers[valid] <= self.edges[-1])
+            if not in_range.all():
+                return False
+            indices = self._to_bin_indices(numbers, valid)
+        self.bin_indices = self.bin_index_buffer.extend(indices)
+        return True
+
+    def edge_values(self):
+        """
+        Returns the bin edges in the type of the column (i.e., as
+        datetime64 values for datetime columns).
+        """
+        if self.is_datetime:
+            return np.round(self.edges).astype(np.int64).view(self.dtype)
+        return self.edges
+
+    def counts(self, mask=None):
+        """
+        Returns the count per bin of the rows selected by the mask.
+        """
+        indices = self.bin_indices if mask is None else self.bin_indices[mask]
+        return np.bincount(indices, minlength=self.num_bins + 1)[1:]
+
+
+def _compact(indices, num_bins):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if num_bins < np.iinfo(dtype).max:
+            return indices.astype(dtype)
+    return indices
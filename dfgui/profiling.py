@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+Lightweight timing instrumentation of the stages of the GUI (filtering,
+sorting, updating rows, formatting cells, redrawing plots). The latest
+durations of each stage are kept in a rolling window, from which the
+latency percentiles and a histogram are derived. Also measures the
+cost of importing dfgui itself.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+_clock = getattr(time, "perf_counter", time.time)
+
+
+class _Measurement(object):
+
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = _clock()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.stage, _clock() - self.start)
+
+
+class Profiler(object):
+    """
+    Records the durations of named stages. Recording is thread-safe, so
+    stages running on worker threads can be measured as well.
+    """
+
+    WINDOW_SIZE = 1000
+    # histogram bin edges (in seconds) for the JSON export
+    HISTOGRAM_EDGES = np.logspace(-6, 2, 33)
+
+    def __init__(self, window_size=WINDOW_SIZE):
+        self.window_size = window_size
+        self.durations = OrderedDict()
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def measure(self, stage):
+        """
+        Returns a context manager measuring the duration of its block:
+
+            with profiler.measure("filter"):
+                ...
+        """
+        return _Measurement(self, stage)
+
+    def record(self, stage, seconds):
+        with self.lock:
+            if stage not in self.durations:
+                self.durations[stage] = deque(maxlen=self.window_size)
+                self.counts[stage] = 0
+            self.durations[stage].append(seconds)
+            self.counts[stage] += 1
+
+    def reset(self):
+        with self.lock:
+            self.durations.clear()
+            self.counts.clear()
+
+    def summary(self):
+        """
+        Returns per stage the total number of calls and the p50/p99/max
+        durations (in seconds) of the rolling window.
+        """
+        with self.lock:
+            windows = [(stage, np.array(durations)) for stage, durations in self.durations.items()]
+            counts = dict(self.counts)
+        result = OrderedDict()
+        for stage, durations in windows:
+            p50, p99 = np.percentile(durations, [50, 99])
+            result[stage] = OrderedDict([
+                ("count", counts[stage]),
+                ("p50", float(p50)),
+                ("p99", float(p99)),
+                ("max", float(durations.max())),
+            ])
+        return result
+
+    def format_summary(self):
+        """
+        Returns a one-line summary like `filter 12/40 ms (3)`, listing
+        p50/p99 and the number of calls per stage.
+        """
+        return " | ".join(
+            "{} {:.1f}/{:.1f} ms ({})".format(stage, stats["p50"] * 1000, stats["p99"] * 1000, stats["count"])
+            for stage, stats in self.summary().items()
+        )
+
+    def to_json(self):
+        """
+        Returns the summary, the histogram of the rolling window and the
+        raw durations per stage as JSON string.
+        """
+        summary = self.summary()
+        with self.lock:
+            windows = dict((stage, list(durations)) for stage, durations in self.durations.items())
+        stages = OrderedDict()
+        for stage, stats in summary.items():
+            counts, edges = np.histogram(windows[stage], bins=self.HISTOGRAM_EDGES)
+            stages[stage] = OrderedDict(stats)
+            stages[stage]["histogram"] = OrderedDict([
+                ("edges", [float(edge) for edge in edges]),
+                ("counts", [int(count) for count in counts]),
+            ])
+            stages[stage]["durations"] = windows[stage]
+        return json.dumps(OrderedDict([("unit", "seconds"), ("stages", stages)]), indent=2)
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+
+# the profiler shared by all GUI components
+profiler = Profiler()
+
+
+# importing dfgui must not pull in wx or the plotting stack
+IMPORT_TIME_BUDGET = 1.0
+HEAVY_MODULES = ["wx", "matplotlib", "seaborn"]
+
+
+def measure_import_time():
+    """
+    Measures `import dfgui` in a fresh interpreter and returns the time
+    and the heavy modules (wx, matplotlib, ...) it imported.
+    """
+    code = (
+        "import sys, time; start = time.time(); import dfgui; "
+        "print(time.time() - start); print(','.join(m for m in {!r} if m in sys.modules))"
+    ).format(HEAVY_MODULES)
+    # run next to the dfgui package, so that this copy of it is imported
+    package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=package_parent).decode().splitlines()
+    heavy_modules = [module for module in output[1].split(",") if module] if len(output) > 1 else []
+    return float(output[0]), heavy_modules
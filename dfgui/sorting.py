@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+Sort orders of single columns, which can be extended by appended rows
+without sorting again.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dfgui.view_model import GrowableArray
+
+
+def _sort_keys(series):
+    """
+    Returns the values to sort a series by (the codes for categoricals)
+    and the mask of its missing values.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.values, series.isnull().values
+    return np.asarray(series.values), series.isnull().values
+
+
+def _group_starts(sorted_values):
+    is_start = np.ones(len(sorted_values), dtype=bool)
+    is_start[1:] = np.asarray(sorted_values[1:] != sorted_values[:-1])
+    return is_start
+
+
+def _descending_order(sorted_values):
+    """
+    Returns the positions of ascending sorted values in descending
+    order, keeping equal values in ascending order of their positions
+    (i.e., reverses the order of the groups of equal values).
+    """
+    num_values = len(sorted_values)
+    starts = np.flatnonzero(_group_starts(sorted_values))
+    lengths = np.diff(np.append(starts, num_values))
+    offsets = np.arange(num_values) - np.repeat(starts, lengths)
+    order = np.empty(num_values, dtype=np.int64)
+    order[np.repeat(num_values - starts - lengths, lengths) + offsets] = np.arange(num_values)
+    return order
+
+
+class ColumnSortOrder(object):
+    """
+    The ascending and descending sort permutations and the dense ranks
+    of the values of a column, all with missing values last and equal
+    values in source order (like a stable `sort_values`). The sorted
+    values are kept next to the permutation, so that appended rows are
+    merged in with binary searches. The descending permutation and the
+    ranks are derived on first use and then maintained incrementally.
+    """
+
+    def __init__(self, column):
+        keys, nulls = _sort_keys(column)
+        values = column.reset_index(drop=True)
+        try:
+            # pandas 0.17
+            permutation = values.sort_values(kind='mergesort').index.values
+        except AttributeError:
+            # pandas 0.16 compatibility
+            permutation = values.order(kind='mergesort').index.values
+        self.permutation = permutation
+        self.num_valid = len(keys) - int(np.count_nonzero(nulls))
+        # the non-missing values in ascending order
+        self.sorted_values = keys[permutation[:self.num_valid]]
+        self.descending_permutation = None
+        self.rank_buffer = None
+        self.uniques = None
+
+    def get_permutation(self, ascending=True):
+        """
+        Returns the row positions in ascending or descending order.
+        """
+        if ascending:
+            return self.permutation
+        if self.descending_permutation is None:
+            order = _descending_order(self.sorted_values)
+            self.descending_permutation = np.concatenate([
+                self.permutation[:self.num_valid][order], self.permutation[self.num_valid:]
+            ])
+        return self.descending_permutation
+
+    def get_ranks(self):
+        """
+        Returns the dense ranks of the values per row (equal values have
+        equal ranks) and the rank of missing values, which is the
+        highest rank.
+        """
+        if self.rank_buffer is None:
+            is_start = _group_starts(self.sorted_values)
+            self.uniques = self.sorted_values[is_start]
+            ranks = np.empty(len(self.permutation), dtype=np.int64)
+            ranks[self.permutation[:self.num_valid]] = np.cumsum(is_start) - 1
+            ranks[self.permutation[self.num_valid:]] = len(self.uniques)
+            self.rank_buffer = GrowableArray(ranks)
+        return self.rank_buffer.values, len(self.uniques)
+
+    def extend(self, column, start):
+        """
+        Merges the rows of the series `column`, which are the rows from
+        `start` on of the source, into the sort order. Returns False if
+        the values cannot be merged, in which case the sort order has to
+        be computed again.
+        """
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # the codes of appended chunks may refer to other categories
+            return False
+        keys, nulls = _sort_keys(column)
+        rows = start + np.arange(len(keys))
+        valid_keys = keys[~nulls]
+        try:
+            order = np.argsort(valid_keys, kind='mergesort')
+            new_values = valid_keys[order]
+            # inserting after equal values keeps the sort stable
+            positions = np.searchsorted(self.sorted_values, new_values, side="right")
+            lower_positions = np.searchsorted(self.sorted_values, new_values, side="left")
+            if self.uniques is not None:
+                new_uniques = new_values[_group_starts(new_values)]
+                unique_positions = np.searchsorted(self.uniques, new_uniques, side="left")
+        except (TypeError, ValueError):
+            return False
+        new_rows = rows[~nulls][order]
+        null_rows = rows[nulls]
+        num_valid = self.num_valid
+
+        if self.descending_permutation is not None:
+            # before all values which are smaller, and after equal values
+            descending = _descending_order(new_values)
+            self.descending_permutation = np.concatenate([
+                np.insert(
+                    self.descending_permutation[:num_valid],
+                    num_valid - lower_positions[descending], new_rows[descending]
+                ),
+                self.descending_permutation[num_valid:], null_rows
+            ])
+
+        if self.uniques is not None:
+            self._extend_ranks(new_uniques, unique_positions, keys, nulls)
+
+        self.permutation = np.concatenate([
+            np.insert(self.permutation[:num_valid], positions, new_rows),
+            self.permutation[num_valid:], null_rows
+        ])
+        self.sorted_values = np.insert(self.sorted_values, positions, new_values)
+        self.num_valid += len(new_values)
+        return True
+
+    def _extend_ranks(self, new_uniques, unique_positions, keys, nulls):
+        uniques = self.uniques
+        clipped = np.minimum(unique_positions, max(len(uniques) - 1, 0))
+        if len(uniques) > 0:
+            is_added = (unique_positions == len(uniques)) | (uniques[clipped] != new_uniques)
+        else:
+            is_added = np.ones(len(new_uniques), dtype=bool)
+        added = new_uniques[is_added]
+        if len(added) > 0:
+            # existing ranks move up by the number of smaller added values
+            num_smaller = np.searchsorted(added, uniques, side="left")
+            new_ranks = np.append(np.arange(len(uniques)) + num_smaller, len(uniques) + len(added))
+            ranks = self.rank_buffer.values
+            ranks[:] = new_ranks[ranks]
+            self.uniques = np.insert(uniques, unique_positions[is_added], added)
+        ranks = np.full(len(keys), len(self.uniques), dtype=np.int64)
+        ranks[~nulls] = np.searchsorted(self.uniques, keys[~nulls], side="left")
+        self.rank_buffer.extend(ranks)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+"""
+Per-column summary statistics of the filtered rows of a data source.
+"""
+
+import hashlib
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+STATISTICS = ["count", "nulls", "min", "max", "mean", "std", "25%", "50%", "75%", "distinct"]
+QUANTILES = [25, 50, 75]
+
+
+class HyperLogLog(object):
+    """
+    HyperLogLog sketch for estimating the number of distinct values with
+    a relative error of about 1.04 / sqrt(2 ** precision).
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = np.zeros(self.num_registers, dtype=np.uint8)
+
+    def add(self, values):
+        """
+        Adds an array of (non-null) values to the sketch.
+        """
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(np.asarray(values))
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        remaining = hashes << np.uint64(p)
+
+        # the rank is the position of the first 1-bit of the remaining bits
+        leading_zeros = np.zeros(len(hashes), dtype=np.int64)
+        for shift in (32, 16, 8, 4, 2, 1):
+            no_bits = remaining < np.uint64(1 << (64 - shift))
+            leading_zeros[no_bits] += shift
+            remaining[no_bits] <<= np.uint64(shift)
+        leading_zeros[remaining == 0] = 64
+        max_rank = 64 - p + 1
+        rank = np.minimum(leading_zeros + 1, max_rank)
+
+        # per register maximum of the ranks via a presence table
+        present = np.bincount(
+            index * (max_rank + 1) + rank, minlength=self.num_registers * (max_rank + 1)
+        ).reshape(self.num_registers, max_rank + 1) > 0
+        highest = max_rank - np.argmax(present[:, ::-1], axis=1)
+        highest[~present.any(axis=1)] = 0
+        self.registers = np.maximum(self.registers, highest.astype(np.uint8))
+
+    def estimate(self):
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(float))
+        num_zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and num_zeros > 0:
+            # small range correction (linear counting)
+            estimate = m * np.log(m / num_zeros)
+        return int(round(estimate))
+
+
+def _distinct_count(values, approximate):
+    if approximate:
+        sketch = HyperLogLog()
+        sketch.add(values)
+        return sketch.estimate()
+    return len(pd.unique(values))
+
+
+def mask_key(mask):
+    """
+    Returns a digest identifying the content of a boolean mask.
+    """
+    return hashlib.sha1(np.ascontiguousarray(mask).view(np.uint8)).hexdigest()
+
+
+class ColumnStatistics(object):
+    """
+    Computes summary statistics of the rows of a data source selected by
+    a filter mask. Columns are fetched and summarized one at a time, so
+    that the memory use does not grow with the number of columns. Results
+    are cached per (mask, column). Above
+    `approximate_threshold` rows, distinct counts are estimated with
+    HyperLogLog and quantiles are computed on a random sample.
+    """
+
+    APPROXIMATE_THRESHOLD = 1000000
+    QUANTILE_SAMPLE_SIZE = 100000
+    MAX_CACHED_MASKS = 8
+
+    def __init__(self, source, approximate_threshold=APPROXIMATE_THRESHOLD):
+        self.source = source
+        self.approximate_threshold = approximate_threshold
+        self.cache = OrderedDict()
+
+    def compute(self, mask, columns=None):
+        """
+        Returns a data frame with one row per column (positions in
+        `columns`, default all) and one column per entry of STATISTICS.
+        """
+        if columns is None:
+            columns = range(len(self.source.columns))
+        key = mask_key(mask)
+        cached = self.cache.pop(key, {})
+        self.cache[key] = cached
+        if len(self.cache) > self.MAX_CACHED_MASKS:
+            self.cache.popitem(last=False)
+
+        missing = [column for column in columns if column not in cached]
+        if len(missing) > 0:
+            cached.update(self._compute(mask, missing))
+
+        return pd.DataFrame(
+            [cached[column] for column in columns],
+            index=[self.source.columns[column] for column in columns],
+            columns=STATISTICS,
+        )
+
+    def _compute(self, mask, columns):
+        num_rows = int(np.count_nonzero(mask))
+        approximate = num_rows > self.approximate_threshold
+        sample = None
+        if approximate:
+            sample_size = min(num_rows, self.QUANTILE_SAMPLE_SIZE)
+            # drawn with replacement from a private random state, which is
+            # cheap and keeps redraws (and the global random state) stable
+            random = np.random.RandomState(0)
+            sample = np.sort(random.randint(0, num_rows, sample_size))
+
+        results = {}
+        for column in columns:
+            # one filtered column at a time, to bound the memory use
+            values = self.source.get_filtered_column(column, mask).values
+            if values.dtype.kind in "iufb":
+                results[column] = self._compute_numeric(values, num_rows, sample, approximate)
+            else:
+                results[column] = self._compute_other(values, sample, approximate)
+        return results
+
+    def _compute_numeric(self, values, num_rows, sample, approximate):
+        numbers = values.astype(float, copy=False)
+        valid = ~np.isnan(numbers)
+        count = int(np.count_nonzero(valid))
+
+        with warnings.catch_warnings(), np.errstate(all="ignore"):
+            # all-NaN columns warn and yield NaN, which is what we want
+            warnings.simplefilter("ignore", RuntimeWarning)
+            if num_rows > 0:
+                minimum = np.nanmin(numbers)
+                maximum = np.nanmax(numbers)
+                quantile_numbers = numbers if sample is None else numbers[sample]
+                quantiles = list(np.nanpercentile(quantile_numbers, QUANTILES))
+            else:
+                minimum = maximum = np.nan
+                quantiles = [np.nan] * len(QUANTILES)
+            mean = np.nanmean(numbers)
+            std = np.nanstd(numbers, ddof=1)
+
+        return [
+            count, num_rows - count, minimum, maximum, mean, std
+        ] + quantiles + [_distinct_count(values[valid], approximate)]
+
+    def _compute_other(self, values, sample, approximate):
+        series = pd.Series(values)
+        valid = series.dropna()
+        minimum = maximum = None
+        quantiles = [None] * len(QUANTILES)
+        try:
+            if len(valid) > 0:
+                minimum, maximum = valid.min(), valid.max()
+            if series.dtype.kind == "M" and len(valid) > 0:
+                quantile_values = valid if sample is None else series.iloc[sample].dropna()
+                quantiles = list(quantile_values.quantile([q / 100 for q in QUANTILES]))
+        except TypeError:
+            # values of mixed types cannot be ordered
+            pass
+        return [
+            len(valid), len(series) - len(valid), minimum, maximum, None, None
+        ] + quantiles + [_distinct_count(valid.values, approximate)]
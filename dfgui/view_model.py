@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8
+
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+
+
+class GrowableArray(object):
+    """
+    A one-dimensional array which can be extended in amortized time
+    proportional to the number of appended values, by over-allocating
+    its buffer geometrically. `values` is a view on the filled part.
+    """
+
+    def __init__(self, values):
+        self.buffer = np.asarray(values)
+        self.size = len(self.buffer)
+
+    @property
+    def values(self):
+        return self.buffer[:self.size]
+
+    def extend(self, values):
+        """
+        Appends the values and returns the extended array.
+        """
+        new_size = self.size + len(values)
+        if new_size > len(self.buffer):
+            buffer = np.empty(max(new_size, 2 * len(self.buffer)), dtype=self.buffer.dtype)
+            buffer[:self.size] = self.values
+            self.buffer = buffer
+        self.buffer[self.size:new_size] = values
+        self.size = new_size
+        return self.values
+
+
+class DataFrameView(object):
+    """
+    A lightweight view on a data source, defined by an array of row
+    positions (in display order) and an array of column positions.
+    Filtering, sorting and projecting only replace these index arrays,
+    cell values are resolved lazily from the underlying data source.
+    The selection is stored as boolean array over the rows of the source,
+    so that it is independent of the current filter and sort order.
+    """
+
+    def __init__(self, source, rows=None, columns=None):
+        self.source = source
+        self.rows = np.arange(source.num_rows) if rows is None else rows
+        self.columns = np.arange(len(source.columns)) if columns is None else columns
+        self.selected_buffer = GrowableArray(np.zeros(source.num_rows, dtype=bool))
+        self.selected = self.selected_buffer.values
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def shape(self):
+        return len(self.rows), len(self.columns)
+
+    def set_rows(self, rows):
+        self.rows = rows
+
+    def set_columns(self, columns):
+        self.columns = columns
+
+    def add_source_rows(self):
+        """
+        Extends the selection to rows appended to the source (which are
+        not selected).
+        """
+        num_new = self.source.num_rows - len(self.selected)
+        self.selected = self.selected_buffer.extend(np.zeros(num_new, dtype=bool))
+
+    def set_selected_items(self, items):
+        """
+        Sets the selection of the visible rows from an array of view
+        positions. Rows hidden by the filter keep their selection state.
+        """
+        self.selected[self.rows] = False
+        self.selected[self.rows[items]] = True
+
+    def get_selected_items(self):
+        """
+        Returns the view positions of the selected visible rows.
+        """
+        return np.flatnonzero(self.selected[self.rows])
+
+    def get_selected_rows(self):
+        """
+        Returns the source positions of the selected visible rows in
+        view order.
+        """
+        return self.rows[self.get_selected_items()]
+
+    def get_value(self, row, col):
+        return self.source.take(self.rows[row:row + 1], self.columns[col:col + 1])[0].iloc[0]
+
+    def get_block(self, start, stop):
+        """
+        Returns the view rows [start, stop) as a list of series, one per
+        view column. Lazy sources only page in the chunks of these rows.
+        """
+        return self.source.take(self.rows[start:stop], self.columns)
+
+    def to_frame(self):
+        """
+        Materializes the view as a data frame (this copies the data).
+        """
+        return self.source.to_frame(self.rows, self.columns)
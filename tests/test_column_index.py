@@ -0,0 +1,42 @@
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dfgui.column_index import build_column_index
+from dfgui.filtering import compile_condition
+
+
+def assert_index_matches_scan(column, condition):
+    expression = compile_condition(condition)
+    index = build_column_index(column)
+    assert index is not None
+    result = index.evaluate(expression)
+    expected = np.asarray(expression.evaluate(column))
+    if result is not None:
+        np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("condition", [
+    "_ < datetime(2016, 1, 1, 0, 0, 10, 500000)",
+    "_ >= datetime(2016, 1, 1, 0, 0, 10, 500000)",
+    "_ == datetime(2016, 1, 1, 0, 0, 10)",
+    "_ < datetime(2016, 1, 1, 0, 0, 11)",
+    "_.between(date(2016, 1, 1), datetime(2016, 1, 1, 0, 0, 10, 1))",
+    "_.isin([date(2016, 1, 1), datetime(2016, 1, 1, 0, 0, 11)])",
+])
+def test_datetime_keys_finer_than_the_column_unit(condition):
+    column = pd.Series(np.array(
+        ["2016-01-01T00:00:00", "2016-01-01T00:00:10", "2016-01-01T00:00:11", "NaT"], dtype="datetime64[s]"
+    ))
+    assert_index_matches_scan(column, condition)
+
+
+@pytest.mark.parametrize("condition", [
+    "_ == 3", "_ != 3", "_ < 2.5", "3 <= _", "_.isin([1, 4, nan])", "~(_ > 5) | (_ == 7)",
+])
+def test_numeric_index_matches_scan(condition):
+    column = pd.Series(np.random.RandomState(0).randint(0, 10, 1000).astype(float))
+    column[::13] = np.nan
+    assert_index_matches_scan(column, condition)
@@ -0,0 +1,49 @@
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dfgui.data_source import as_data_source
+from dfgui.engine import DataFrameViewModel
+
+
+def create_frame(num_rows=1000):
+    random = np.random.RandomState(0)
+    return pd.DataFrame({
+        "int": np.arange(num_rows),
+        "float": random.normal(0, 1, num_rows),
+        "string": np.array(["A", "B", "C"], dtype=object)[random.randint(0, 3, num_rows)],
+    })
+
+
+def write_arrow(df, path, batch_size):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    with pyarrow.ipc.new_file(str(path), table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=batch_size):
+            writer.write_batch(batch)
+
+
+def test_arrow_round_trip(tmp_path):
+    df = create_frame()
+    path = tmp_path / "table.arrow"
+    write_arrow(df, path, batch_size=300)
+
+    source = as_data_source(str(path))
+    assert source.num_chunks == 4
+    rows = np.array([999, 0, 299, 300, 512])
+    result = source.to_frame(rows, np.arange(3))
+    pd.testing.assert_frame_equal(result, df.iloc[rows].reset_index(drop=True))
+
+
+def test_arrow_page_fetch(tmp_path):
+    df = create_frame()
+    path = tmp_path / "table.arrow"
+    write_arrow(df, path, batch_size=300)
+
+    model = DataFrameViewModel(str(path))
+    model.sort([("float", True)])
+    expected = df.sort_values("float", kind="mergesort")
+    assert model.get_page(0, 1) == [[str(value) for value in expected.iloc[0]]]
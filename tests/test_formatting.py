@@ -0,0 +1,28 @@
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+import pandas as pd
+
+from dfgui.data_source import DataFrameSource
+from dfgui.formatting import format_series, typical_text_length
+
+
+def test_typical_text_length_keeps_the_global_random_state():
+    df = pd.DataFrame({"a": np.arange(100000), "b": ["x" * 12] * 100000})
+    np.random.seed(1)
+    expected = np.random.random_sample()
+    np.random.seed(1)
+    assert typical_text_length(DataFrameSource(df), 0) == 5
+    assert typical_text_length(DataFrameSource(df), 1) == 12
+    assert np.random.random_sample() == expected
+
+
+def test_datetimes_are_formatted_like_timestamps():
+    values = pd.Series(pd.to_datetime([
+        "2016-01-01", "2016-01-01 12:30", None, "1969-12-31 23:59:59.5",
+        "2016-01-01 00:00:00.000000001", "2016-01-01 00:00:00.000123",
+    ], format="ISO8601"))
+    expected = [str(value) for value in values]
+    assert list(format_series(values)) == expected
+    # the format does not depend on the other values of a block
+    assert [format_series(values.iloc[i:i + 1])[0] for i in range(len(values))] == expected
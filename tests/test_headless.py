@@ -0,0 +1,190 @@
+from __future__ import absolute_import, division, print_function
+
+"""
+Tests of the parts of dfgui which run without wx.
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dfgui.aggregation import GroupByAggregation
+from dfgui.data_source import StreamingSource, as_data_source
+from dfgui.engine import DataFrameViewModel
+from dfgui.profiling import IMPORT_TIME_BUDGET, measure_import_time
+
+
+def create_frame(num_rows, random_state=0):
+    random = np.random.RandomState(random_state)
+    return pd.DataFrame({
+        "int": random.randint(0, 10, num_rows),
+        "float": random.normal(0, 1, num_rows),
+        "string": np.array(["A", "B", "C", None], dtype=object)[random.randint(0, 4, num_rows)],
+        "date": np.datetime64("2016-01-01") + random.randint(0, 50, num_rows).astype("timedelta64[D]"),
+    })
+
+
+def test_import_is_cheap():
+    # measured in a fresh interpreter
+    import_time, heavy_modules = measure_import_time()
+    assert heavy_modules == []
+    assert import_time < IMPORT_TIME_BUDGET
+
+
+CONDITIONS = [
+    ("int", "_ == 2"),
+    ("float", "(_ > -0.5) & (_ < 1.5)"),
+    ("float", "abs(_) * 2 < 1"),
+    ("string", "_.isin(['A', 'C'])"),
+    ("date", "_ >= date(2016, 1, 10)"),
+]
+
+
+@pytest.mark.parametrize("num_threads", [2, 3, 8])
+@pytest.mark.parametrize("chunk_size", [None, 1000, 2500])
+def test_parallel_filter_matches_single_thread(num_threads, chunk_size):
+    df = create_frame(10000)
+    models = []
+    for filter_threads in [1, num_threads]:
+        source = df if chunk_size is None else StreamingSource(df, chunk_size)
+        model = DataFrameViewModel(source, filter_threads=filter_threads)
+        model.USE_COLUMN_INDEXES = False
+        model.MIN_ROWS_PER_THREAD = 500
+        models.append(model)
+
+    for condition in CONDITIONS:
+        single, parallel = [model.compute_mask([condition]) for model in models]
+        assert single[1] == parallel[1] == []
+        np.testing.assert_array_equal(single[0], parallel[0])
+    assert models[1].thread_pool_size == num_threads
+
+
+# conditions on numeric columns, whose evaluation releases the GIL
+NUMERIC_CONDITIONS = [
+    ("float", "(_ > -0.5) & (_ < 1.5)"),
+    ("float", "abs(_) * 2 < 1"),
+]
+
+
+def measure_filter_scan(model, conditions, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        # drop the cached condition masks, so that the conditions are scanned again
+        with model.condition_lock:
+            model.condition_masks.clear()
+        start = time.time()
+        model.compute_mask(conditions)
+        timings.append(time.time() - start)
+    return min(timings)
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="requires multiple CPUs")
+def test_parallel_filter_is_faster_on_multiple_cpus():
+    df = pd.DataFrame({"float": np.random.RandomState(0).normal(0, 1, 4000000)})
+    timings = []
+    for filter_threads in [1, min(os.cpu_count(), 4)]:
+        model = DataFrameViewModel(df, filter_threads=filter_threads)
+        timings.append(measure_filter_scan(model, NUMERIC_CONDITIONS))
+    assert timings[1] < timings[0]
+
+
+def test_filter_threads_default_is_read_at_call_time(monkeypatch):
+    model = DataFrameViewModel(create_frame(100))
+    monkeypatch.setattr(DataFrameViewModel, "FILTER_THREADS", 4)
+    assert model.get_filter_threads() == 4
+
+
+def test_descending_sort_keeps_missing_values_last():
+    df = pd.DataFrame({"a": [3, np.nan, 1, 2, np.nan, 1]})
+    model = DataFrameViewModel(df)
+    model.sort([("a", False)])
+    np.testing.assert_array_equal(model.view.rows, [0, 3, 2, 5, 1, 4])
+
+
+@pytest.mark.parametrize("ascending", [[True, False], [False, True], [False, False]])
+def test_multi_key_sort_matches_pandas(ascending):
+    df = create_frame(2000)
+    df.loc[df.index % 7 == 0, "float"] = np.nan
+    df["float"] = df["float"].round(1)
+    model = DataFrameViewModel(df)
+    model.sort([("string", ascending[0]), ("float", ascending[1])])
+    expected = df.reset_index(drop=True).sort_values(["string", "float"], ascending=ascending, kind="mergesort")
+    np.testing.assert_array_equal(model.view.rows, expected.index.values)
+
+
+def expected_masks(df):
+    return [
+        df["int"] == 2,
+        (df["float"] > -0.5) & (df["float"] < 1.5),
+        df["float"].abs() * 2 < 1,
+        df["string"].isin(["A", "C"]),
+        df["date"] >= pd.Timestamp("2016-01-10"),
+    ]
+
+
+@pytest.mark.parametrize("dictionary_encode", [False, True])
+def test_filter_matches_pandas(dictionary_encode):
+    df = create_frame(5000)
+    model = DataFrameViewModel(df, dictionary_encode=dictionary_encode)
+    for condition, expected in zip(CONDITIONS, expected_masks(df)):
+        changed, errors = model.apply_filter([condition])
+        assert errors == []
+        np.testing.assert_array_equal(model.view.rows, np.flatnonzero(expected.values))
+
+    model.apply_filter(CONDITIONS)
+    expected = np.logical_and.reduce([mask.values for mask in expected_masks(df)])
+    np.testing.assert_array_equal(model.view.rows, np.flatnonzero(expected))
+
+
+@pytest.mark.parametrize("dictionary_encode", [False, True])
+@pytest.mark.parametrize("ascending", [True, False])
+def test_sort_matches_pandas(dictionary_encode, ascending):
+    df = create_frame(5000)
+    df.loc[df.index % 11 == 0, "date"] = None
+    model = DataFrameViewModel(df, dictionary_encode=dictionary_encode)
+    for column in df.columns:
+        model.sort([(column, ascending)])
+        expected = df.sort_values(column, ascending=ascending, kind="mergesort")
+        np.testing.assert_array_equal(model.view.rows, expected.index.values)
+
+
+@pytest.mark.parametrize("sort_by_columns", [
+    [("float", True)],
+    [("float", False)],
+    [("string", False)],
+    [("int", True), ("float", False)],
+    [("string", False), ("date", True), ("int", False)],
+])
+def test_streaming_append_matches_full_frame(sort_by_columns):
+    df = create_frame(6000)
+    df.loc[df.index % 9 == 0, "float"] = np.nan
+    # values which only occur in appended rows
+    df.loc[3000:, "int"] += 5
+    df.loc[4000:, "string"] = df.loc[4000:, "string"].str.lower()
+    model = DataFrameViewModel(StreamingSource(df.iloc[:1000], chunk_size=700))
+    model.apply_filter(CONDITIONS[1:3])
+    model.sort(sort_by_columns)
+    sort_orders = dict(model.sort_orders)
+    for start in range(1000, len(df), 1300):
+        model.append_rows(df.iloc[start:start + 1300])
+    # the sort orders are extended rather than computed again
+    assert model.sort_orders == sort_orders
+
+    expected = DataFrameViewModel(df)
+    expected.apply_filter(CONDITIONS[1:3])
+    expected.sort(sort_by_columns)
+    assert model.source.num_rows == len(df)
+    np.testing.assert_array_equal(model.view.rows, expected.view.rows)
+    assert model.get_page(0, 20) == expected.get_page(0, 20)
+
+
+def test_group_by_counts_groups_with_missing_keys():
+    df = pd.DataFrame({"key": ["a", "b", None, "a", None], "value": [1.0, 2.0, 3.0, 4.0, np.nan]})
+    aggregation = GroupByAggregation(as_data_source(df))
+    result = aggregation.compute(np.ones(len(df), dtype=bool), [0], [], ["count"])
+    assert list(result.columns) == ["key", "count"]
+    assert list(result["count"]) == [2, 1, 2]
+    assert result["key"].isnull().iloc[-1]